@@ -0,0 +1,175 @@
+import asyncio
+import json
+import math
+import os
+import time
+
+from metrics import QUEUE_DEPTH
+
+
+def _env_int(name, default):
+    return int(os.getenv(name, str(default)))
+
+
+# Per endpoint class: concurrent requests, requests allowed to wait, max upload size in MB.
+# Override with e.g. ADMISSION_VIDEO_CONCURRENCY=2, ADMISSION_VIDEO_QUEUE=4, MAX_UPLOAD_MB_VIDEO=1024.
+ENDPOINT_CLASS_DEFAULTS = {
+    'single': {'concurrency': 4, 'queue': 16, 'max_upload_mb': 25, 'retry_after': 1},
+    'batch': {'concurrency': 1, 'queue': 2, 'max_upload_mb': 1024, 'retry_after': 30},
+    'video': {'concurrency': 1, 'queue': 2, 'max_upload_mb': 4096, 'retry_after': 60},
+    'report': {'concurrency': 2, 'queue': 4, 'max_upload_mb': 512, 'retry_after': 10},
+}
+
+# How long a queued request waits for a slot before giving up with 503
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv('ADMISSION_QUEUE_TIMEOUT', '30'))
+
+
+class Saturated(Exception):
+    def __init__(self, retry_after):
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Bounded concurrency plus a bounded wait queue for one endpoint class"""
+
+    def __init__(self, name, concurrency, queue, retry_after, queue_timeout=ADMISSION_QUEUE_TIMEOUT):
+        self.name = name
+        self.concurrency = concurrency
+        self.max_queue = queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.waiting = 0
+        # Smoothed slot hold time, seeded with the configured Retry-After
+        self.avg_service_time = float(retry_after)
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._queue_gauge = QUEUE_DEPTH.labels(f"admission_{name}")
+
+    def retry_after(self):
+        """Seconds until a slot is likely to free up, from the smoothed service time"""
+        backlog = (self.waiting + 1) / max(self.concurrency, 1)
+        return max(1, min(600, math.ceil(self.avg_service_time * backlog)))
+
+    async def acquire(self):
+        if self.active >= self.concurrency and self.waiting >= self.max_queue:
+            raise Saturated(self.retry_after())
+
+        self.waiting += 1
+        self._queue_gauge.inc()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise Saturated(self.retry_after())
+        finally:
+            self.waiting -= 1
+            self._queue_gauge.dec()
+        self.active += 1
+        return time.perf_counter()
+
+    def release(self, acquired_at):
+        self.active -= 1
+        self._semaphore.release()
+        held = time.perf_counter() - acquired_at
+        self.avg_service_time = 0.8 * self.avg_service_time + 0.2 * held
+
+
+def build_controllers():
+    """Create one controller per endpoint class from ENDPOINT_CLASS_DEFAULTS and the environment"""
+    controllers = {}
+    for name, defaults in ENDPOINT_CLASS_DEFAULTS.items():
+        prefix = f"ADMISSION_{name.upper()}"
+        controllers[name] = AdmissionController(
+            name,
+            concurrency=_env_int(f"{prefix}_CONCURRENCY", defaults['concurrency']),
+            queue=_env_int(f"{prefix}_QUEUE", defaults['queue']),
+            retry_after=_env_int(f"{prefix}_RETRY_AFTER", defaults['retry_after']),
+        )
+    return controllers
+
+
+def max_upload_bytes(endpoint_class):
+    defaults = ENDPOINT_CLASS_DEFAULTS[endpoint_class]
+    return _env_int(f"MAX_UPLOAD_MB_{endpoint_class.upper()}", defaults['max_upload_mb']) * 1024 * 1024
+
+
+class _UploadTooLarge(Exception):
+    pass
+
+
+async def _send_json(send, status, detail, headers=()):
+    body = json.dumps({'detail': detail}).encode()
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode()), *headers],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+class AdmissionMiddleware:
+    """ASGI middleware that admits requests per endpoint class before their body is read.
+
+    When a class is saturated it answers 503 with Retry-After immediately. Request bodies
+    are counted as they stream in and rejected with 413 once they pass the class limit.
+    """
+
+    def __init__(self, app, routes):
+        self.app = app
+        self.routes = routes
+        self.controllers = build_controllers()
+        self.limits = {name: max_upload_bytes(name) for name in self.controllers}
+
+    async def __call__(self, scope, receive, send):
+        endpoint_class = self.routes.get(scope.get('path')) if scope['type'] == 'http' else None
+        if endpoint_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        limit = self.limits[endpoint_class]
+        for name, value in scope.get('headers', []):
+            if name == b'content-length' and value.isdigit() and int(value) > limit:
+                await _send_json(send, 413, f"Upload exceeds {limit // (1024 * 1024)} MB limit")
+                return
+
+        controller = self.controllers[endpoint_class]
+        try:
+            acquired_at = await controller.acquire()
+        except Saturated as e:
+            await _send_json(
+                send, 503, f"Server busy ({endpoint_class} requests at capacity), retry later",
+                headers=[(b'retry-after', str(e.retry_after).encode())]
+            )
+            return
+
+        received = 0
+        too_large = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, too_large
+            message = await receive()
+            if message['type'] == 'http.request':
+                received += len(message.get('body', b''))
+                if received > limit:
+                    too_large = True
+                    raise _UploadTooLarge()
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            if too_large:
+                # Body parsing turned our abort into its own error response; replace it with 413
+                if message['type'] == 'http.response.start' and not response_started:
+                    response_started = True
+                    await _send_json(send, 413, f"Upload exceeds {limit // (1024 * 1024)} MB limit")
+                return
+            if message['type'] == 'http.response.start':
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except _UploadTooLarge:
+            if not response_started:
+                await _send_json(send, 413, f"Upload exceeds {limit // (1024 * 1024)} MB limit")
+        finally:
+            controller.release(acquired_at)
@@ -0,0 +1,194 @@
+"""Micro-benchmarks for the inference and report rendering hot paths.
+
+Runs offline against stub models (CRACK_MODEL_STUB=1) and synthetic inputs.
+
+    cd Backend
+    python -m benchmarks.bench --output bench.json
+    python -m benchmarks.bench --save-baseline            # record benchmarks/baseline.json
+    python -m benchmarks.bench --baseline benchmarks/baseline.json --threshold 0.2
+
+Exits with status 1 when any case's median is more than --threshold slower than the baseline.
+"""
+import os
+
+os.environ.setdefault("CRACK_MODEL_STUB", "1")
+# Endpoint cases must not write an inspection history file
+os.environ["HISTORY_DB"] = ""
+
+import argparse
+import gc
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+
+import cv2
+from PIL import Image
+
+from benchmarks.synthetic import (
+    make_crack_image, make_zip_bytes, make_video_bytes, to_data_uri, make_batch_results, make_video_results
+)
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def build_cases(scale=1.0):
+    """Return {name: (callable, rounds)}; heavy setup happens here, outside the timed region"""
+    import api_v_2_3
+    import inference_api as api
+    from report_api import report_service
+
+    frame = make_crack_image(1280, 720, seed=1)
+    pil_img = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+    yolo_results = api.models.current.detector(frame, conf=0.0)
+    boxes_a = [[i * 40, i * 30, i * 40 + 120, i * 30 + 90] for i in range(10)]
+    boxes_b = [[x + 15, y + 10, x2 + 15, y2 + 10] for x, y, x2, y2 in boxes_a]
+
+    uri = to_data_uri(frame)
+    report_count = max(1, int(50 * scale))
+    batch_results = make_batch_results(report_count, uri)
+    video_results = make_video_results(report_count, uri)
+
+    def save_base64_image():
+        os.remove(report_service._save_base64_image(uri))
+
+    # Sub-microsecond calls are looped so timer resolution does not dominate
+    def iou_x1000():
+        for _ in range(1000):
+            api.iou(boxes_a[0], boxes_b[0])
+
+    def are_different_cracks_x100():
+        for _ in range(100):
+            api.are_different_cracks(boxes_a, boxes_b)
+
+    cases = {
+        "preprocess_image_from_pil": (lambda: api.preprocess_image_from_pil(pil_img), 50),
+        "draw_yolo_boxes_separately": (lambda: api.draw_yolo_boxes_separately(frame, yolo_results), 10),
+        "pil_to_base64": (lambda: api.pil_to_base64(pil_img), 10),
+        "iou_x1000": (iou_x1000, 20),
+        "are_different_cracks_x100": (are_different_cracks_x100, 20),
+        "report_service._save_base64_image": (save_base64_image, 20),
+        "generate_report": (
+            lambda: report_service.generate_report({"crack_type": "Vertical Crack", "confidence": 0.9}, uri), 5
+        ),
+        "generate_batch_report": (lambda: report_service.generate_batch_report(batch_results), 3),
+        "generate_video_report": (lambda: report_service.generate_video_report(video_results), 3),
+    }
+
+    try:
+        from fastapi.testclient import TestClient
+    except ImportError:  # httpx missing; endpoint cases are skipped
+        return cases
+
+    client = TestClient(api_v_2_3.app)
+    zip_bytes = make_zip_bytes(count=max(1, int(10 * scale)), width=1280, height=720)
+    video_bytes = make_video_bytes(frames=max(1, int(60 * scale)), width=640, height=360)
+
+    def zip_upload():
+        response = client.post("/zip_upload", files={"file": ("bench.zip", zip_bytes, "application/zip")})
+        response.raise_for_status()
+
+    def process_video():
+        response = client.post("/video", files={"file": ("bench.mp4", video_bytes, "video/mp4")})
+        response.raise_for_status()
+
+    cases["endpoint:/zip_upload"] = (zip_upload, 3)
+    cases["endpoint:/video"] = (process_video, 3)
+    return cases
+
+
+def run_case(fn, rounds, warmup=1):
+    """Time `fn` and return summary statistics in milliseconds"""
+    for _ in range(warmup):
+        fn()
+
+    samples = []
+    gc_was_enabled = gc.isenabled()
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            start = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - start) * 1000.0)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    samples.sort()
+    return {
+        "rounds": rounds,
+        "min_ms": round(samples[0], 4),
+        "median_ms": round(statistics.median(samples), 4),
+        "mean_ms": round(statistics.fmean(samples), 4),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 4),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Return a list of (name, current, baseline, ratio) for cases slower than the threshold"""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous or not previous.get("median_ms"):
+            continue
+        ratio = current["median_ms"] / previous["median_ms"]
+        if ratio > 1.0 + threshold:
+            regressions.append((name, current["median_ms"], previous["median_ms"], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Crack detection micro-benchmarks")
+    parser.add_argument("--output", help="write results JSON to this path")
+    parser.add_argument("--baseline", help="compare against this results JSON")
+    parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE, metavar="PATH",
+                        help=f"write results as the new baseline (default {DEFAULT_BASELINE})")
+    parser.add_argument("--threshold", type=float, default=float(os.getenv("BENCH_REGRESSION_THRESHOLD", "0.2")),
+                        help="allowed median slowdown before failing, as a fraction (default 0.2)")
+    parser.add_argument("--filter", default="", help="only run cases whose name contains this string")
+    parser.add_argument("--scale", type=float, default=1.0, help="scale report/ZIP/video sizes")
+    parser.add_argument("--rounds", type=int, help="override rounds for every case")
+    args = parser.parse_args(argv)
+
+    cases = build_cases(args.scale)
+    results = {}
+    for name, (fn, rounds) in cases.items():
+        if args.filter and args.filter not in name:
+            continue
+        results[name] = run_case(fn, args.rounds or rounds)
+        stats = results[name]
+        print(f"{name:40s} median {stats['median_ms']:10.3f} ms   p95 {stats['p95_ms']:10.3f} ms")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "scale": args.scale,
+        },
+        "results": results,
+    }
+
+    for path in filter(None, [args.output, args.save_baseline]):
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {path}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for name, current, previous, ratio in regressions:
+            print(f"REGRESSION {name}: {previous:.3f} ms -> {current:.3f} ms ({ratio:.2f}x)")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
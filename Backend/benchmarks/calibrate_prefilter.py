@@ -0,0 +1,174 @@
+"""Calibrate the pre-filter threshold: recall against skip rate and estimated speedup.
+
+Labels come from `crack/` and `no_crack/` subfolders when the sample folder has them,
+otherwise from running the crack detector on every image. --synthetic generates labelled
+concrete-like images instead of reading a folder.
+
+    cd Backend
+    python -m benchmarks.calibrate_prefilter --folder samples/ --output prefilter_report.json
+    python -m benchmarks.calibrate_prefilter --synthetic 200 --detect-ms 80
+
+Pick the highest threshold whose recall you can accept and pass it as prefilter_threshold
+(or set PREFILTER_THRESHOLD).
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+import cv2
+
+from prefilter import DEFAULT_PREFILTER_THRESHOLD, crack_score
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+DEFAULT_THRESHOLDS = [0.0005, 0.001, 0.0015, 0.002, 0.003, 0.004, 0.006, 0.008, 0.012, 0.02]
+
+
+def _image_paths(folder):
+    return sorted(
+        os.path.join(folder, name) for name in os.listdir(folder) if name.lower().endswith(IMAGE_EXTENSIONS)
+    )
+
+
+def load_folder(folder):
+    """Yield (name, BGR image, label or None) for the sample folder"""
+    labelled = os.path.isdir(os.path.join(folder, 'crack')) and os.path.isdir(os.path.join(folder, 'no_crack'))
+    sources = [('crack', True), ('no_crack', False)] if labelled else [('', None)]
+    for subdir, label in sources:
+        for path in _image_paths(os.path.join(folder, subdir)):
+            frame = cv2.imread(path)
+            if frame is not None:
+                yield os.path.relpath(path, folder), frame, label
+
+
+def load_synthetic(count, width, height):
+    from benchmarks.synthetic import make_crack_image
+
+    for i in range(count):
+        yield f"synthetic_crack_{i:04d}", make_crack_image(width, height, seed=i), True
+        yield f"synthetic_clean_{i:04d}", make_crack_image(width, height, seed=10_000 + i, cracks=0), False
+
+
+def score_samples(samples, detector=None):
+    """Return per-sample records with pre-filter score/time and, with a detector, its label/time"""
+    records = []
+    for name, frame, label in samples:
+        start = time.perf_counter()
+        score = crack_score(frame)
+        prefilter_ms = (time.perf_counter() - start) * 1000.0
+
+        detect_ms = None
+        if label is None:
+            start = time.perf_counter()
+            results = detector(frame)
+            detect_ms = (time.perf_counter() - start) * 1000.0
+            label = len(results[0].boxes) > 0
+
+        records.append({
+            'name': name, 'cracked': bool(label), 'score': score,
+            'prefilter_ms': prefilter_ms, 'detect_ms': detect_ms,
+        })
+    return records
+
+
+def sweep(records, thresholds, detect_ms):
+    """Recall, skip rates and estimated speedup for each threshold"""
+    prefilter_ms = statistics.fmean(r['prefilter_ms'] for r in records)
+    cracked = [r for r in records if r['cracked']]
+    clean = [r for r in records if not r['cracked']]
+
+    rows = []
+    for threshold in thresholds:
+        passed = sum(1 for r in records if r['score'] >= threshold)
+        pass_rate = passed / len(records)
+        clean_pass_rate = sum(1 for r in clean if r['score'] >= threshold) / len(clean) if clean else 0.0
+        rows.append({
+            'threshold': threshold,
+            'recall': sum(1 for r in cracked if r['score'] >= threshold) / len(cracked) if cracked else None,
+            'skip_rate': 1.0 - pass_rate,
+            'clean_skip_rate': 1.0 - clean_pass_rate if clean else None,
+            # Per-image cost with the pre-filter is its own time plus YOLO on the images that pass
+            'speedup': detect_ms / (prefilter_ms + pass_rate * detect_ms),
+            'clean_speedup': detect_ms / (prefilter_ms + clean_pass_rate * detect_ms),
+        })
+    return rows, prefilter_ms
+
+
+def recommend(rows, min_recall):
+    """Highest threshold that keeps recall at or above min_recall"""
+    eligible = [row for row in rows if row['recall'] is not None and row['recall'] >= min_recall]
+    return max(eligible, key=lambda row: row['threshold']) if eligible else None
+
+
+def _fmt(value, pattern):
+    return '-' if value is None else pattern.format(value)
+
+
+def print_report(rows, prefilter_ms, detect_ms, records, best):
+    cracked = sum(1 for r in records if r['cracked'])
+    print(f"{len(records)} images ({cracked} cracked, {len(records) - cracked} clean)")
+    print(f"pre-filter {prefilter_ms:.2f} ms/image, detector {detect_ms:.2f} ms/image\n")
+    print(f"{'threshold':>10s} {'recall':>8s} {'skip':>8s} {'clean skip':>11s} {'speedup':>8s} {'clean speedup':>14s}")
+    for row in rows:
+        marker = '  <- recommended' if row is best else ''
+        print(f"{row['threshold']:10.4f} {_fmt(row['recall'], '{:8.3f}')} {row['skip_rate']:8.3f} "
+              f"{_fmt(row['clean_skip_rate'], '{:11.3f}')} {row['speedup']:7.2f}x {row['clean_speedup']:13.2f}x{marker}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-filter threshold calibration")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--folder', help="sample images; crack/ and no_crack/ subfolders provide labels")
+    source.add_argument('--synthetic', type=int, metavar='N', help="generate N cracked and N clean images")
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=720)
+    parser.add_argument('--thresholds', help="comma-separated thresholds to evaluate")
+    parser.add_argument('--detect-ms', type=float,
+                        help="detector cost per image when it is not run for labels (default 100)")
+    parser.add_argument('--min-recall', type=float, default=0.99)
+    parser.add_argument('--output', help="write the report JSON to this path")
+    args = parser.parse_args(argv)
+
+    detector = None
+    if args.folder:
+        if not (os.path.isdir(os.path.join(args.folder, 'crack')) and os.path.isdir(os.path.join(args.folder, 'no_crack'))):
+            from model_loader import ModelLoader
+            detector = ModelLoader().get_models()[0]
+        samples = load_folder(args.folder)
+    else:
+        samples = load_synthetic(args.synthetic, args.width, args.height)
+
+    records = score_samples(samples, detector)
+    if not records:
+        raise SystemExit("No images found")
+
+    measured = [r['detect_ms'] for r in records if r['detect_ms'] is not None]
+    detect_ms = args.detect_ms or (statistics.fmean(measured) if measured else 100.0)
+
+    thresholds = sorted({float(t) for t in args.thresholds.split(',')} if args.thresholds
+                        else set(DEFAULT_THRESHOLDS) | {DEFAULT_PREFILTER_THRESHOLD})
+    rows, prefilter_ms = sweep(records, thresholds, detect_ms)
+    best = recommend(rows, args.min_recall)
+    print_report(rows, prefilter_ms, detect_ms, records, best)
+    if best is None:
+        print(f"\nNo threshold reaches recall {args.min_recall}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'images': len(records),
+                'prefilter_ms': prefilter_ms,
+                'detect_ms': detect_ms,
+                'min_recall': args.min_recall,
+                'recommended_threshold': best['threshold'] if best else None,
+                'thresholds': rows,
+                'samples': records,
+            }, f, indent=2)
+        print(f"\nReport written to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
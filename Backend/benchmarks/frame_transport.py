@@ -0,0 +1,98 @@
+"""Cross-process frame transport: pickling through a Queue against the shared-memory FrameRing.
+
+A producer process pushes synthetic frames to a consumer process that reads every frame,
+once through a multiprocessing.Queue (each frame pickled and copied) and once through
+frame_ring.FrameRing (only slot numbers cross the process boundary).
+
+    cd Backend
+    python -m benchmarks.frame_transport --frames 300 --width 1920 --height 1080
+    python -m benchmarks.frame_transport --width 3840 --height 2160 --slots 4
+"""
+import argparse
+import multiprocessing
+import sys
+import time
+
+import numpy as np
+
+from frame_ring import FrameRing
+
+
+def _frames(count, width, height):
+    # A few distinct frames reused, so generating them is not what gets measured
+    rng = np.random.default_rng(0)
+    pool = [rng.integers(0, 256, (height, width, 3), dtype=np.uint8) for _ in range(4)]
+    for i in range(count):
+        yield pool[i % len(pool)]
+
+
+def queue_producer(q, count, width, height):
+    for frame in _frames(count, width, height):
+        q.put(frame)
+    q.put(None)
+
+
+def queue_consumer(q, result):
+    checksum = 0
+    while (frame := q.get()) is not None:
+        checksum += int(frame[::64, ::64, 0].sum())
+    result.put(checksum)
+
+
+def ring_producer(ring, count, width, height):
+    for frame in _frames(count, width, height):
+        ring.put(frame)
+    ring.finish()
+    ring.close()
+
+
+def ring_consumer(ring, result):
+    checksum = 0
+    while (frame := ring.get()) is not None:
+        checksum += int(frame.array[::64, ::64, 0].sum())
+        ring.release(frame.slot)
+    del frame
+    result.put(checksum)
+    ring.close()
+
+
+def run(producer, consumer, transport, args):
+    result = multiprocessing.Queue()
+    start = time.perf_counter()
+    procs = [
+        multiprocessing.Process(target=producer, args=(transport, args.frames, args.width, args.height)),
+        multiprocessing.Process(target=consumer, args=(transport, result)),
+    ]
+    for p in procs:
+        p.start()
+    checksum = result.get()
+    for p in procs:
+        p.join()
+    return time.perf_counter() - start, checksum
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Frame transport benchmark")
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--width', type=int, default=1920)
+    parser.add_argument('--height', type=int, default=1080)
+    parser.add_argument('--slots', type=int, default=8)
+    args = parser.parse_args(argv)
+
+    mb = args.width * args.height * 3 / 1e6
+    print(f"{args.frames} frames of {args.width}x{args.height} ({mb:.1f} MB each)")
+
+    elapsed, expected = run(queue_producer, queue_consumer, multiprocessing.Queue(maxsize=args.slots), args)
+    print(f"{'pickled Queue':>14s}: {args.frames / elapsed:8.1f} frames/s  {elapsed / args.frames * 1000:7.2f} ms/frame")
+
+    with FrameRing(args.slots, (args.height, args.width, 3)) as ring:
+        elapsed, checksum = run(ring_producer, ring_consumer, ring, args)
+    print(f"{'FrameRing':>14s}: {args.frames / elapsed:8.1f} frames/s  {elapsed / args.frames * 1000:7.2f} ms/frame")
+    if checksum != expected:
+        print("Checksum mismatch between transports")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
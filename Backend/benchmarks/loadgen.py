@@ -0,0 +1,258 @@
+"""End-to-end load generator with per-endpoint latency percentiles.
+
+Starts the API in-process with stub models (default), or drives an already running
+server with --url. Reports throughput, p50/p95/p99 latency per endpoint and server RSS.
+
+    cd Backend
+    python -m benchmarks.loadgen --concurrency 8 --duration 30 --mix predict=6,zip=1,video=1,report=2
+    python -m benchmarks.loadgen --url http://localhost:8000 --server-pid 1234 --requests 500
+
+Set CRACK_MODEL_STUB=0 to load the real models in in-process mode, or CRACK_STUB_DETECT_MS /
+CRACK_STUB_CLASSIFY_MS to give the stubs a realistic service time.
+"""
+import os
+
+os.environ.setdefault("CRACK_MODEL_STUB", "1")
+# Load runs must not write an inspection history file
+os.environ["HISTORY_DB"] = ""
+
+import argparse
+import asyncio
+import json
+import random
+import socket
+import sys
+import threading
+import time
+
+import httpx
+
+from benchmarks.synthetic import (
+    make_crack_image, encode_image, make_zip_bytes, make_video_bytes,
+    to_data_uri, make_batch_results, make_video_results
+)
+
+DEFAULT_MIX = "predict=6,zip=1,video=1,report=2"
+
+
+def build_workloads(args):
+    """Return {name: coroutine factory taking an httpx.AsyncClient}"""
+    rng = random.Random(0)
+    images = [encode_image(make_crack_image(args.width, args.height, seed=i)) for i in range(8)]
+    zip_bytes = make_zip_bytes(count=args.zip_images, width=args.width, height=args.height)
+    video_bytes = make_video_bytes(frames=args.video_frames, width=640, height=360)
+    uri = to_data_uri(make_crack_image(args.width, args.height, seed=99))
+    batch_payload = {"results": make_batch_results(args.report_items, uri)}
+    video_payload = {"results": make_video_results(args.report_items, uri)}
+    single_payload = {"crack_type": "Vertical Crack", "confidence": 0.91, "image_base64": uri}
+
+    def predict(client):
+        image = rng.choice(images)
+        return client.post("/predict", files={"file": ("load.jpg", image, "image/jpeg")})
+
+    def zip_upload(client):
+        return client.post("/zip_upload", files={"file": ("load.zip", zip_bytes, "application/zip")})
+
+    def video(client):
+        return client.post("/video", files={"file": ("load.mp4", video_bytes, "video/mp4")})
+
+    def report(client):
+        # Spread report traffic across the three report endpoints
+        choice = rng.random()
+        if choice < 0.4:
+            return client.post("/generate-batch-report", json=batch_payload)
+        if choice < 0.8:
+            return client.post("/generate-video-report", json=video_payload)
+        return client.post("/generate-report", json=single_payload)
+
+    return {"predict": predict, "zip": zip_upload, "video": video, "report": report}
+
+
+def parse_mix(mix):
+    weights = {}
+    for item in mix.split(","):
+        name, _, weight = item.partition("=")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def read_rss_mb(pid):
+    """Resident set size of `pid` from /proc, in MB (None where /proc is unavailable)"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        return None
+    return None
+
+
+class InProcessServer:
+    """Run the FastAPI app under uvicorn in a background thread"""
+
+    def __init__(self, host="127.0.0.1"):
+        import uvicorn
+        from api_v_2_3 import app
+
+        with socket.socket() as sock:
+            sock.bind((host, 0))
+            self.port = sock.getsockname()[1]
+        self.url = f"http://{host}:{self.port}"
+        self.server = uvicorn.Server(uvicorn.Config(app, host=host, port=self.port, log_level="warning"))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join(timeout=10)
+
+
+async def run_load(base_url, workloads, weights, concurrency, duration, total_requests, timeout, server_pid):
+    names = [name for name in weights if weights[name] > 0]
+    unknown = set(names) - set(workloads)
+    if unknown:
+        raise SystemExit(f"Unknown workload(s) in --mix: {', '.join(sorted(unknown))}")
+    name_weights = [weights[name] for name in names]
+
+    latencies = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+    rss_samples = []
+    issued = 0
+    deadline = time.perf_counter() + duration if duration else None
+
+    async def sample_rss():
+        while True:
+            rss = read_rss_mb(server_pid)
+            if rss is not None:
+                rss_samples.append(rss)
+            await asyncio.sleep(0.5)
+
+    async def worker(client):
+        nonlocal issued
+        rng = random.Random()
+        while True:
+            if deadline and time.perf_counter() >= deadline:
+                return
+            if total_requests and issued >= total_requests:
+                return
+            issued += 1
+            name = rng.choices(names, weights=name_weights)[0]
+            start = time.perf_counter()
+            try:
+                response = await workloads[name](client)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            latencies[name].append(time.perf_counter() - start)
+            if not ok:
+                errors[name] += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        sampler = asyncio.create_task(sample_rss())
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        sampler.cancel()
+
+    endpoints = {}
+    for name in names:
+        values = sorted(latencies[name])
+        endpoints[name] = {
+            "requests": len(values),
+            "errors": errors[name],
+            "throughput_rps": round(len(values) / elapsed, 3) if elapsed else 0.0,
+            "p50_ms": round(percentile(values, 50) * 1000, 2),
+            "p95_ms": round(percentile(values, 95) * 1000, 2),
+            "p99_ms": round(percentile(values, 99) * 1000, 2),
+            "max_ms": round(values[-1] * 1000, 2) if values else 0.0,
+        }
+
+    total = sum(len(v) for v in latencies.values())
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "concurrency": concurrency,
+        "total_requests": total,
+        "total_errors": sum(errors.values()),
+        "throughput_rps": round(total / elapsed, 3) if elapsed else 0.0,
+        "server_rss_mb": {
+            "start": round(rss_samples[0], 1) if rss_samples else None,
+            "peak": round(max(rss_samples), 1) if rss_samples else None,
+            "end": round(rss_samples[-1], 1) if rss_samples else None,
+        },
+        "endpoints": endpoints,
+    }
+
+
+def print_summary(summary):
+    print(f"\n{summary['total_requests']} requests in {summary['elapsed_s']}s "
+          f"at concurrency {summary['concurrency']}: {summary['throughput_rps']} req/s, "
+          f"{summary['total_errors']} errors")
+    rss = summary["server_rss_mb"]
+    if rss["peak"] is not None:
+        print(f"Server RSS: start {rss['start']} MB, peak {rss['peak']} MB, end {rss['end']} MB")
+    print(f"\n{'endpoint':10s} {'reqs':>6s} {'errs':>5s} {'req/s':>8s} {'p50 ms':>10s} {'p95 ms':>10s} {'p99 ms':>10s}")
+    for name, stats in summary["endpoints"].items():
+        print(f"{name:10s} {stats['requests']:6d} {stats['errors']:5d} {stats['throughput_rps']:8.2f} "
+              f"{stats['p50_ms']:10.1f} {stats['p95_ms']:10.1f} {stats['p99_ms']:10.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Crack detection API load generator")
+    parser.add_argument("--url", help="target a running server instead of starting one in-process")
+    parser.add_argument("--server-pid", type=int, help="pid to sample RSS from when using --url")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to run (0 to rely on --requests)")
+    parser.add_argument("--requests", type=int, default=0, help="stop after this many requests")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"endpoint weights (default {DEFAULT_MIX})")
+    parser.add_argument("--timeout", type=float, default=300.0, help="per-request timeout in seconds")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--zip-images", type=int, default=10)
+    parser.add_argument("--video-frames", type=int, default=60)
+    parser.add_argument("--report-items", type=int, default=30)
+    parser.add_argument("--output", help="write the summary JSON to this path")
+    args = parser.parse_args(argv)
+
+    if not args.duration and not args.requests:
+        parser.error("one of --duration or --requests must be non-zero")
+
+    weights = parse_mix(args.mix)
+    workloads = build_workloads(args)
+
+    def run(base_url, pid):
+        return asyncio.run(run_load(base_url, workloads, weights, args.concurrency, args.duration,
+                                    args.requests, args.timeout, pid))
+
+    if args.url:
+        summary = run(args.url.rstrip("/"), args.server_pid)
+    else:
+        with InProcessServer() as server:
+            # Client and server share a process here, so RSS includes the load generator
+            summary = run(server.url, os.getpid())
+
+    summary["mix"] = weights
+    print_summary(summary)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=2)
+        print(f"\nSummary written to {args.output}")
+    return 1 if summary["total_errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
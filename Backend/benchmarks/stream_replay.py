@@ -0,0 +1,137 @@
+"""Replay a video file into the live stream endpoint and report end-to-end latency.
+
+Frames are JPEG-encoded and sent at the video's frame rate (or --fps). Each reply is matched
+to its frame by sequence number to measure send-to-reply latency; frames the server dropped
+because a newer one arrived are counted from the final summary.
+
+    cd Backend
+    python -m benchmarks.stream_replay --video site.mp4 --url ws://localhost:8000/ws/stream
+    python -m benchmarks.stream_replay --synthetic 300 --fps 30
+
+Without --url the API is started in-process with stub models (see benchmarks.loadgen).
+"""
+import os
+
+os.environ.setdefault("CRACK_MODEL_STUB", "1")
+
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+import time
+
+import cv2
+
+from benchmarks.loadgen import InProcessServer, percentile
+
+
+def read_frames(path, quality, max_frames=None):
+    """Return (fps, [jpeg bytes]) for the video"""
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise SystemExit(f"Could not open video: {path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+    frames = []
+    try:
+        while max_frames is None or len(frames) < max_frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])[1].tobytes())
+    finally:
+        cap.release()
+    return fps, frames
+
+
+async def replay(url, frames, fps):
+    import websockets
+
+    sent_at = {}
+    latencies = []
+    server_ms = []
+    events = 0
+    summary = None
+
+    async with websockets.connect(url, max_size=None) as ws:
+        async def send():
+            interval = 1.0 / fps
+            start = time.perf_counter()
+            for seq, data in enumerate(frames, start=1):
+                delay = start + (seq - 1) * interval - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                sent_at[seq] = time.perf_counter()
+                await ws.send(data)
+            await ws.send("stop")
+
+        sender = asyncio.create_task(send())
+        async for message in ws:
+            reply = json.loads(message)
+            if reply['type'] == 'frame':
+                latencies.append((time.perf_counter() - sent_at[reply['seq']]) * 1000)
+                server_ms.append(reply['server_ms'])
+                events += len(reply['events'])
+            elif reply['type'] == 'summary':
+                summary = reply
+                break
+            else:
+                print(f"Server error on frame {reply.get('seq')}: {reply.get('detail')}")
+        await sender
+
+    return latencies, server_ms, events, summary
+
+
+def print_report(frames, fps, elapsed, latencies, server_ms, events, summary):
+    latencies.sort()
+    server_ms.sort()
+    print(f"{len(frames)} frames sent at {fps:g} fps in {elapsed:.1f}s")
+    if summary:
+        print(f"processed {summary['processed']}, dropped {summary['dropped']} "
+              f"({summary['dropped'] / max(summary['received'], 1):.1%}), {len(summary['tracks'])} open tracks at end")
+    print(f"track events {events}")
+    print(f"{'':10s} {'p50':>8s} {'p95':>8s} {'p99':>8s} {'max':>8s}")
+    for name, values in (('end-to-end', latencies), ('server', server_ms)):
+        if values:
+            print(f"{name:10s} {percentile(values, 50):8.1f} {percentile(values, 95):8.1f} "
+                  f"{percentile(values, 99):8.1f} {values[-1]:8.1f}  ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Live stream replay client")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--video', help="video file to replay")
+    source.add_argument('--synthetic', type=int, metavar='N', help="replay N generated frames")
+    parser.add_argument('--url', help="stream endpoint, e.g. ws://localhost:8000/ws/stream (default: in-process server)")
+    parser.add_argument('--fps', type=float, help="send rate (default: the video's frame rate)")
+    parser.add_argument('--quality', type=int, default=80, help="JPEG quality of sent frames")
+    parser.add_argument('--max-frames', type=int)
+    args = parser.parse_args(argv)
+
+    if args.synthetic:
+        from benchmarks.synthetic import make_video_bytes
+        with tempfile.NamedTemporaryFile(suffix='.mp4') as tmp:
+            tmp.write(make_video_bytes(frames=args.synthetic))
+            tmp.flush()
+            fps, frames = read_frames(tmp.name, args.quality, args.max_frames)
+    else:
+        fps, frames = read_frames(args.video, args.quality, args.max_frames)
+    fps = args.fps or fps
+    if not frames:
+        raise SystemExit("No frames to send")
+
+    async def run(url):
+        start = time.perf_counter()
+        result = await replay(url, frames, fps)
+        print_report(frames, fps, time.perf_counter() - start, *result)
+
+    if args.url:
+        asyncio.run(run(args.url))
+    else:
+        with InProcessServer() as server:
+            asyncio.run(run(server.url.replace('http://', 'ws://') + '/ws/stream'))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
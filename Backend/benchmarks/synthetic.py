@@ -0,0 +1,98 @@
+"""Synthetic inputs for benchmarks and load tests (no real survey data needed)."""
+import base64
+import io
+import os
+import tempfile
+import zipfile
+import cv2
+import numpy as np
+
+
+def make_crack_image(width=1280, height=720, seed=0, cracks=3):
+    """Concrete-like grey texture with a few dark crack polylines, as a BGR array"""
+    rng = np.random.RandomState(seed)
+    noise = rng.normal(150, 12, (height // 4, width // 4)).astype(np.float32)
+    texture = cv2.resize(noise, (width, height), interpolation=cv2.INTER_LINEAR)
+    img = cv2.cvtColor(np.clip(texture, 0, 255).astype(np.uint8), cv2.COLOR_GRAY2BGR)
+
+    for _ in range(cracks):
+        x, y = rng.randint(0, width), rng.randint(0, height)
+        points = [(x, y)]
+        for _ in range(rng.randint(4, 10)):
+            x = int(np.clip(x + rng.randint(-60, 61), 0, width - 1))
+            y = int(np.clip(y + rng.randint(-60, 61), 0, height - 1))
+            points.append((x, y))
+        cv2.polylines(img, [np.array(points, np.int32)], False, (35, 35, 35), int(rng.randint(1, 4)))
+    return img
+
+
+def encode_image(img, ext=".jpg"):
+    """Encode a BGR array to image file bytes"""
+    ok, encoded = cv2.imencode(ext, img)
+    if not ok:
+        raise ValueError(f"Could not encode synthetic image as {ext}")
+    return encoded.tobytes()
+
+
+def make_zip_bytes(count=20, width=1280, height=720, ext=".jpg", seed=0):
+    """ZIP archive of `count` synthetic images"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as zf:
+        for i in range(count):
+            zf.writestr(f"image_{i:04d}{ext}", encode_image(make_crack_image(width, height, seed + i), ext))
+    return buffer.getvalue()
+
+
+def write_video(path, frames=60, width=640, height=360, fps=25, seed=0):
+    """Write an mp4 where a crack pattern drifts across the frame"""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    if not writer.isOpened():
+        raise RuntimeError(f"Could not open video writer for {path}")
+    base = make_crack_image(width * 2, height, seed)
+    try:
+        for i in range(frames):
+            offset = (i * 4) % width
+            writer.write(np.ascontiguousarray(base[:, offset:offset + width]))
+    finally:
+        writer.release()
+    return path
+
+
+def make_video_bytes(frames=60, width=640, height=360, fps=25, seed=0):
+    """Synthetic mp4 as bytes"""
+    fd, path = tempfile.mkstemp(suffix=".mp4")
+    os.close(fd)
+    try:
+        write_video(path, frames, width, height, fps, seed)
+        with open(path, "rb") as f:
+            return f.read()
+    finally:
+        os.remove(path)
+
+
+def to_data_uri(img, ext=".png"):
+    """Encode a BGR array as the data URI format the API returns"""
+    mime = "png" if ext == ".png" else "jpeg"
+    return f"data:image/{mime};base64," + base64.b64encode(encode_image(img, ext)).decode()
+
+
+CRACK_TYPES = ["Horizontal Crack", "Vertical Crack", "Unprecidented Crack"]
+
+
+def make_batch_results(count, image_uri):
+    """/zip_upload-shaped results for report benchmarks; every fourth image is clean"""
+    return [
+        {"cracked": i % 4 != 0, "orientation": CRACK_TYPES[i % 3] if i % 4 else None,
+         "annotated_image": image_uri if i % 4 else None}
+        for i in range(count)
+    ]
+
+
+def make_video_results(count, image_uri):
+    """/video-shaped results (HTML image links) for report benchmarks"""
+    link = f'<a href="{image_uri}" target="_blank"><img src="{image_uri}" width="100"/></a>'
+    return [
+        {"Frame #": i * 12, "Timestamp (s)": round(i * 0.48, 2), "Crack Status": "Cracked",
+         "Classification": CRACK_TYPES[i % 3], "Full Annotated Image": link, "Separate Bounding Boxes": []}
+        for i in range(count)
+    ]
@@ -0,0 +1,86 @@
+"""Reusable frame-sized scratch buffers for the drawing path.
+
+Annotating a frame needs a full-resolution copy to draw on. Allocating a fresh one for
+every cracked frame churns tens of megabytes per second on video and keeps RSS high
+after the garbage collector has run. BufferPool hands out arrays by shape and takes them
+back when the block ends:
+
+    with draw_buffers.lease(frame.shape) as canvas:
+        np.copyto(canvas, frame)
+        ...
+
+A leased buffer belongs to one thread until it is returned, so concurrent requests never
+share one. At most max_free buffers per shape and max_bytes in total are kept; when a ZIP
+of mixed resolutions pushes past the total, the least recently used shapes are dropped.
+"""
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+
+# Idle buffers kept per frame shape (one per concurrently drawing request is enough)
+DRAW_BUFFER_POOL_SIZE = int(os.getenv("DRAW_BUFFER_POOL_SIZE", "4"))
+# Cap on idle buffer memory across all shapes (a 4K BGR frame is ~25 MB)
+DRAW_BUFFER_POOL_MB = float(os.getenv("DRAW_BUFFER_POOL_MB", "256"))
+
+
+class BufferPool:
+    def __init__(self, max_free=DRAW_BUFFER_POOL_SIZE, max_bytes=int(DRAW_BUFFER_POOL_MB * 1024 * 1024),
+                 dtype=np.uint8):
+        self.max_free = max_free
+        self.max_bytes = max_bytes
+        self.dtype = np.dtype(dtype)
+        self._free = OrderedDict()  # shape -> idle buffers, least recently used first
+        self._lock = threading.Lock()
+        self.pooled_bytes = 0
+        self.allocated = 0
+
+    def acquire(self, shape):
+        shape = tuple(shape)
+        with self._lock:
+            buffers = self._free.get(shape)
+            if buffers:
+                buf = buffers.pop()
+                if not buffers:
+                    del self._free[shape]
+                self.pooled_bytes -= buf.nbytes
+                return buf
+            self.allocated += 1
+        return np.empty(shape, dtype=self.dtype)
+
+    def release(self, buf):
+        if buf.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            buffers = self._free.setdefault(buf.shape, [])
+            self._free.move_to_end(buf.shape)
+            if len(buffers) >= self.max_free:
+                return
+            buffers.append(buf)
+            self.pooled_bytes += buf.nbytes
+            # Evict from the least recently used shapes until back under the cap
+            while self.pooled_bytes > self.max_bytes:
+                shape, oldest = next(iter(self._free.items()))
+                if oldest:
+                    self.pooled_bytes -= oldest.pop().nbytes
+                if not oldest:
+                    del self._free[shape]
+
+    @contextmanager
+    def lease(self, shape):
+        """A buffer of the given shape for the duration of the block; its contents are undefined"""
+        buf = self.acquire(shape)
+        try:
+            yield buf
+        finally:
+            self.release(buf)
+
+    def clear(self):
+        with self._lock:
+            self._free.clear()
+            self.pooled_bytes = 0
+
+
+draw_buffers = BufferPool()
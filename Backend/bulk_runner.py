@@ -0,0 +1,326 @@
+"""Offline crack detection over a directory tree, without going through HTTP.
+
+Each worker process loads the models once and runs the same per-image code as
+/zip_upload. Results are appended to the output as files finish, and every finished
+file is recorded in a manifest next to it, so an interrupted run picks up where it
+stopped when started again with the same arguments.
+
+    cd Backend
+    python bulk_runner.py /data/survey --output survey.jsonl --workers 4
+    python bulk_runner.py /data/survey --output survey.csv --prefilter --per-box
+    python bulk_runner.py /data/incoming --output incoming.jsonl --watch --interval 10
+
+Parquet output (--format parquet) needs pyarrow and is written as one part file per
+batch into the output directory.
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import time
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+OUTPUT_FORMATS = ('jsonl', 'csv', 'parquet')
+# Flat columns for CSV and Parquet; detections are stored as a JSON string
+RESULT_FIELDS = [
+    'path', 'cracked', 'orientation', 'num_detections', 'max_confidence',
+    'prefiltered', 'detections', 'error', 'elapsed_ms',
+]
+
+# Set in each worker process by _init_worker
+_api = None
+_options = None
+
+
+def _init_worker(workers, options):
+    global _api, _options
+    # Ctrl+C is handled by the parent, which terminates the pool
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Split the CPU budget between the worker processes (see thread_budget.plan_threads)
+    os.environ['WEB_CONCURRENCY'] = str(workers)
+    import inference_api
+    _api = inference_api
+    _options = options
+
+
+def analyze_file(task):
+    """Run detection on one file in a worker; returns (task, result row)"""
+    path, relpath = task[0], task[1]
+    start = time.perf_counter()
+    row = {'path': relpath, 'cracked': None, 'orientation': None, 'num_detections': 0,
+           'max_confidence': None, 'prefiltered': False, 'detections': [], 'error': None}
+    try:
+        result = _api.analyze_zip_image(path, relpath, _options['prefilter_threshold'], "none", _options['per_box'])
+        if result is None:
+            row['error'] = "Invalid image format"
+        else:
+            detections = result['detections']
+            row.update(
+                cracked=result['cracked'],
+                orientation=result['orientation'],
+                num_detections=len(detections),
+                max_confidence=max((d['confidence'] for d in detections), default=None),
+                prefiltered=result['prefiltered'],
+                detections=detections,
+            )
+    except Exception as e:
+        row['error'] = f"{type(e).__name__}: {e}"
+        row['retry'] = True
+    row['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 1)
+    return task, row
+
+
+def scan(root):
+    """Yield (path, relpath, size, mtime_ns) for every image under root"""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                yield path, os.path.relpath(path, root), st.st_size, st.st_mtime_ns
+
+
+class Manifest:
+    """Append-only record of finished files: one JSON line with relpath, size and mtime each.
+
+    A file counts as done only if its size and mtime still match, so replaced files are
+    processed again.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.done = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:  # torn last line from an interrupted run
+                        continue
+                    self.done[entry['path']] = (entry['size'], entry['mtime_ns'])
+        self._file = open(path, 'a')
+
+    def is_done(self, relpath, size, mtime_ns):
+        return self.done.get(relpath) == (size, mtime_ns)
+
+    def add(self, relpath, size, mtime_ns):
+        self.done[relpath] = (size, mtime_ns)
+        self._file.write(json.dumps({'path': relpath, 'size': size, 'mtime_ns': mtime_ns}) + '\n')
+        self._file.flush()
+
+    def add_all(self, keys):
+        """Record (relpath, size, mtime_ns) keys returned by ResultWriter"""
+        for key in keys:
+            self.add(*key)
+
+    def close(self):
+        self._file.close()
+
+
+class ResultWriter:
+    """Appends result rows to a JSONL or CSV file, or Parquet part files in a directory.
+
+    Each row can carry a manifest key. write(), flush() and close() return the keys of the
+    rows that just reached the disk, so the manifest never gets ahead of the results:
+    Parquet rows wait in memory until a part file is written.
+    """
+
+    def __init__(self, path, fmt, parquet_batch=1000):
+        self.path = path
+        self.format = fmt
+        self.parquet_batch = parquet_batch
+        self._pending = []
+        self._pending_keys = []
+        self._file = None
+        if fmt == 'parquet':
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise SystemExit("--format parquet needs pyarrow (pip install pyarrow)")
+            os.makedirs(path, exist_ok=True)
+        else:
+            new = not os.path.exists(path) or os.path.getsize(path) == 0
+            self._file = open(path, 'a', newline='')
+            if fmt == 'csv':
+                self._csv = csv.DictWriter(self._file, fieldnames=RESULT_FIELDS)
+                if new:
+                    self._csv.writeheader()
+
+    def write(self, row, key=None):
+        """Add a row; returns the keys of rows now on disk"""
+        keys = [key] if key is not None else []
+        if self.format == 'parquet':
+            self._pending.append(dict(row, detections=json.dumps(row['detections'])))
+            self._pending_keys.extend(keys)
+            if len(self._pending) >= self.parquet_batch:
+                return self.flush()
+            return []
+        if self.format == 'jsonl':
+            self._file.write(json.dumps(row) + '\n')
+        else:
+            self._csv.writerow(dict(row, detections=json.dumps(row['detections'])))
+        self._file.flush()
+        return keys
+
+    def flush(self):
+        """Write pending Parquet rows as a part file; returns their keys"""
+        if self.format != 'parquet' or not self._pending:
+            return []
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        part = os.path.join(self.path, f"part-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{len(os.listdir(self.path)):05d}.parquet")
+        pq.write_table(pa.Table.from_pylist(self._pending), part)
+        keys = self._pending_keys
+        self._pending = []
+        self._pending_keys = []
+        return keys
+
+    def close(self):
+        keys = self.flush()
+        if self._file:
+            self._file.close()
+        return keys
+
+
+def output_format(path, fmt=None):
+    if fmt:
+        return fmt
+    ext = os.path.splitext(path)[1].lower().lstrip('.')
+    return {'json': 'jsonl', 'jsonl': 'jsonl', 'csv': 'csv', 'parquet': 'parquet'}.get(ext, 'jsonl')
+
+
+class BulkRunner:
+    def __init__(self, root, writer, manifest, workers, options):
+        self.root = root
+        self.writer = writer
+        self.manifest = manifest
+        self.workers = workers
+        self.options = options
+        self.pool = None  # started on first use; each worker loads its own models
+        self.stats = {'processed': 0, 'cracked': 0, 'errors': 0}
+        self.started_at = time.perf_counter()
+
+    def pending(self, stable_sizes=None):
+        """Files under root not yet in the manifest.
+
+        With stable_sizes (watch mode), a file is only returned once its size and mtime are
+        unchanged since the previous scan, so files still being copied in are left alone.
+        """
+        tasks = []
+        seen = {}
+        for task in scan(self.root):
+            path, relpath, size, mtime_ns = task
+            if self.manifest.is_done(relpath, size, mtime_ns):
+                continue
+            if stable_sizes is not None:
+                seen[relpath] = (size, mtime_ns)
+                if stable_sizes.get(relpath) != (size, mtime_ns):
+                    continue
+            tasks.append(task)
+        if stable_sizes is not None:
+            stable_sizes.clear()
+            stable_sizes.update(seen)
+        return tasks
+
+    def run(self, tasks):
+        if not tasks:
+            return
+        if self.pool is None:
+            self.pool = multiprocessing.get_context('spawn').Pool(
+                self.workers, initializer=_init_worker, initargs=(self.workers, self.options)
+            )
+        total = len(tasks)
+        chunksize = max(1, min(16, total // (self.workers * 8)))
+        for done, (task, row) in enumerate(self.pool.imap_unordered(analyze_file, tasks, chunksize), start=1):
+            if row.pop('retry', False):
+                # Not written and not in the manifest, so the next run tries the file again
+                print(f"Failed {row['path']}: {row['error']} (will retry on the next run)")
+            else:
+                # Recorded only once its row is on disk, so an interruption can repeat a row
+                # but never lose one
+                self.manifest.add_all(self.writer.write(row, task[1:]))
+            self.stats['processed'] += 1
+            self.stats['cracked'] += bool(row['cracked'])
+            self.stats['errors'] += row['error'] is not None
+            if done % 100 == 0 or done == total:
+                rate = self.stats['processed'] / (time.perf_counter() - self.started_at)
+                print(f"Processed {done}/{total} ({rate:.1f} images/s, {self.stats['cracked']} cracked, "
+                      f"{self.stats['errors']} errors)")
+        self.manifest.add_all(self.writer.flush())
+
+    def watch(self, interval):
+        """Process new files as they appear until interrupted"""
+        stable_sizes = {}
+        print(f"Watching {self.root} every {interval:g}s (Ctrl+C to stop)")
+        while True:
+            self.run(self.pending(stable_sizes))
+            time.sleep(interval)
+
+    def terminate(self):
+        if self.pool is not None:
+            self.pool.terminate()
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline bulk crack detection")
+    parser.add_argument('root', help="directory tree of images")
+    parser.add_argument('--output', required=True, help="results file (.jsonl/.csv) or Parquet directory")
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, help="default: from the output extension, else jsonl")
+    parser.add_argument('--manifest', help="finished-file manifest (default: <output>.manifest)")
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument('--prefilter', action='store_true', help="skip detection on images the edge check rules out")
+    parser.add_argument('--prefilter-threshold', type=float)
+    parser.add_argument('--per-box', action='store_true', help="also classify the orientation of each box")
+    parser.add_argument('--watch', action='store_true', help="keep running and process new files as they arrive")
+    parser.add_argument('--interval', type=float, default=5.0, help="seconds between scans in watch mode")
+    parser.add_argument('--parquet-batch', type=int, default=1000, help="rows per Parquet part file")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.root):
+        raise SystemExit(f"Not a directory: {args.root}")
+
+    prefilter_threshold = None
+    if args.prefilter:
+        from prefilter import DEFAULT_PREFILTER_THRESHOLD
+        prefilter_threshold = args.prefilter_threshold if args.prefilter_threshold is not None else DEFAULT_PREFILTER_THRESHOLD
+
+    writer = ResultWriter(args.output, output_format(args.output, args.format), args.parquet_batch)
+    manifest = Manifest(args.manifest or args.output.rstrip('/\\') + '.manifest')
+    options = {'prefilter_threshold': prefilter_threshold, 'per_box': args.per_box}
+    runner = BulkRunner(args.root, writer, manifest, args.workers, options)
+
+    try:
+        tasks = runner.pending()
+        print(f"{len(tasks)} images to process ({len(manifest.done)} already done), {args.workers} worker(s)")
+        runner.run(tasks)
+        if args.watch:
+            runner.watch(args.interval)
+    except KeyboardInterrupt:
+        print("Interrupted; rerun the same command to resume")
+        runner.terminate()
+    finally:
+        manifest.add_all(writer.close())
+        manifest.close()
+        runner.close()
+
+    elapsed = time.perf_counter() - runner.started_at
+    print(f"Done: {runner.stats['processed']} images in {elapsed:.1f}s, {runner.stats['cracked']} cracked, "
+          f"{runner.stats['errors']} errors")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
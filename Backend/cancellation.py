@@ -0,0 +1,81 @@
+import asyncio
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import HTTPException
+
+from metrics import record_cancelled
+
+# Per endpoint class processing deadline in seconds (0 disables), e.g. REQUEST_DEADLINE_VIDEO=600
+DEADLINE_DEFAULTS = {'batch': 900, 'video': 1800}
+
+# How often the client connection is polled while a request is processed
+DISCONNECT_POLL_SECONDS = float(os.getenv('DISCONNECT_POLL_SECONDS', '0.5'))
+
+
+def deadline_for(endpoint_class):
+    seconds = float(os.getenv(f"REQUEST_DEADLINE_{endpoint_class.upper()}", DEADLINE_DEFAULTS.get(endpoint_class, 0)))
+    return seconds or None
+
+
+class RequestCancelled(Exception):
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class CancelToken:
+    """Cancellation flag shared between an async handler and its threadpool work.
+
+    Processing loops call check() between units of work (frames, images); it raises
+    RequestCancelled once the client has gone away or the deadline has passed.
+    """
+
+    def __init__(self, deadline_seconds=None):
+        self.deadline_seconds = deadline_seconds
+        self.deadline = time.monotonic() + deadline_seconds if deadline_seconds else None
+        self.reason = None
+        self._event = threading.Event()
+
+    def cancel(self, reason):
+        if self.reason is None:
+            self.reason = reason
+        self._event.set()
+
+    def check(self):
+        if self.deadline is not None and not self._event.is_set() and time.monotonic() > self.deadline:
+            self.cancel('deadline')
+        if self._event.is_set():
+            raise RequestCancelled(self.reason)
+
+
+@asynccontextmanager
+async def cancellable(request, endpoint_class):
+    """Yield a CancelToken that trips when the client disconnects or the class deadline passes"""
+    token = CancelToken(deadline_for(endpoint_class))
+
+    async def watch():
+        while True:
+            if await request.is_disconnected():
+                token.cancel('disconnected')
+                return
+            await asyncio.sleep(DISCONNECT_POLL_SECONDS)
+
+    watcher = asyncio.create_task(watch())
+    try:
+        yield token
+    finally:
+        watcher.cancel()
+
+
+def cancelled_error(e, token):
+    """Log and count a cancelled request; return the HTTPException to raise"""
+    record_cancelled(e.reason)
+    if e.reason == 'deadline':
+        print(f"Request stopped: processing deadline of {token.deadline_seconds:g}s exceeded")
+        return HTTPException(status_code=504, detail=f"Processing deadline of {token.deadline_seconds:g}s exceeded")
+    print("Request stopped: client disconnected")
+    # Nobody is listening any more; 499 is the conventional "client closed request" status
+    return HTTPException(status_code=499, detail="Client disconnected")
@@ -0,0 +1,45 @@
+import cv2
+import numpy as np
+
+# 8x8 difference hash -> 64-bit fingerprint
+DHASH_SIZE = 8
+
+
+def dhash(gray, hash_size=DHASH_SIZE):
+    """Difference hash of a grayscale image: one bit per horizontally adjacent pixel pair"""
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def dhash_file(path, hash_size=DHASH_SIZE):
+    """dHash of an image file, or None if it cannot be decoded.
+
+    JPEGs are decoded straight to 1/4-scale grayscale, which is much cheaper than a full decode.
+    """
+    gray = cv2.imread(path, cv2.IMREAD_REDUCED_GRAYSCALE_4)
+    if gray is None:
+        return None
+    return dhash(gray, hash_size)
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+class DuplicateIndex:
+    """Groups near-identical images: each image joins the first group whose leader is within max_distance bits"""
+
+    def __init__(self, max_distance):
+        self.max_distance = max_distance
+        self.leaders = []
+
+    def find(self, image_hash):
+        """Return the item stored for the matching group leader, or None"""
+        for leader_hash, item in self.leaders:
+            if hamming(image_hash, leader_hash) <= self.max_distance:
+                return item
+        return None
+
+    def add(self, image_hash, item):
+        self.leaders.append((image_hash, item))
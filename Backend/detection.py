@@ -0,0 +1,122 @@
+"""Per-request detector settings: confidence and NMS thresholds, box cap and region of interest.
+
+Handlers set a DetectionParams for the request with detection_params(); detect() reads it,
+so the settings reach every detector call of the request, including threadpool work.
+
+With an ROI polygon the detector only sees the polygon's bounding rectangle (a view of the
+frame, not a copy), which saves detector compute on fixed-camera footage. Boxes are mapped
+back to full-frame coordinates and kept only if their centre lies inside the polygon, so
+drawing, classification and the response only ever see boxes in the region.
+"""
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import cv2
+import numpy as np
+
+# Defaults match ultralytics' own predict defaults
+DETECT_CONF = float(os.getenv("DETECT_CONF", "0.25"))
+DETECT_IOU = float(os.getenv("DETECT_IOU", "0.7"))
+DETECT_MAX_DET = int(os.getenv("DETECT_MAX_DET", "300"))
+
+
+class RoiError(ValueError):
+    """Invalid ROI, or one that does not overlap the frame"""
+
+
+def parse_roi(text):
+    """Polygon from "x1,y1,x2,y2,x3,y3,..." (pixels); None for an empty value. Raises RoiError"""
+    if not text or not text.strip():
+        return None
+    try:
+        values = [float(v) for v in text.replace(";", ",").split(",") if v.strip()]
+    except ValueError:
+        raise RoiError("roi must be comma-separated pixel coordinates x1,y1,x2,y2,...")
+    if len(values) % 2 or len(values) < 6:
+        raise RoiError("roi needs at least three x,y points")
+    if min(values) < 0:
+        raise RoiError("roi coordinates must not be negative")
+    return Roi(np.array(values, dtype=np.float32).reshape(-1, 2))
+
+
+class Roi:
+    """Polygon region of interest in frame pixels"""
+
+    def __init__(self, points):
+        self.points = points
+        self._bounds = {}
+
+    def bounds(self, shape):
+        """Integer (x1, y1, x2, y2) of the polygon clipped to a frame of this shape; None if outside it"""
+        key = shape[:2]
+        if key not in self._bounds:
+            h, w = key
+            x1, y1 = np.floor(self.points.min(axis=0)).astype(int)
+            x2, y2 = np.ceil(self.points.max(axis=0)).astype(int) + 1
+            x1, y1, x2, y2 = max(x1, 0), max(y1, 0), min(x2, w), min(y2, h)
+            self._bounds[key] = (x1, y1, x2, y2) if x2 > x1 and y2 > y1 else None
+        return self._bounds[key]
+
+    def contains(self, x, y):
+        return cv2.pointPolygonTest(self.points, (float(x), float(y)), False) >= 0
+
+
+class DetectionParams:
+    def __init__(self, conf=DETECT_CONF, iou=DETECT_IOU, max_det=DETECT_MAX_DET, roi=None):
+        self.conf = conf
+        self.iou = iou
+        self.max_det = max_det
+        self.roi = roi
+
+    def crop(self, frame):
+        """The part of the frame the detector sees (a view); the whole frame without an ROI"""
+        if self.roi is None:
+            return frame
+        bounds = self.roi.bounds(frame.shape)
+        if bounds is None:
+            raise RoiError(f"roi lies outside the {frame.shape[1]}x{frame.shape[0]} frame")
+        x1, y1, x2, y2 = bounds
+        return frame[y1:y2, x1:x2]
+
+
+DEFAULT_PARAMS = DetectionParams()
+
+# Settings for the request being handled
+_params = ContextVar('crack_detection_params', default=None)
+
+
+def current_params():
+    return _params.get() or DEFAULT_PARAMS
+
+
+@contextmanager
+def detection_params(params):
+    """Run every detection inside the block (including threadpool work) with these settings"""
+    token = _params.set(params)
+    try:
+        yield params
+    finally:
+        _params.reset(token)
+
+
+def detect(detector, frame, params=None):
+    """Detector results for a BGR frame, in full-frame coordinates"""
+    params = params or current_params()
+    results = detector(params.crop(frame), conf=params.conf, iou=params.iou, max_det=params.max_det,
+                       verbose=False)
+    if params.roi is not None:
+        _to_frame(results[0], params.roi, frame.shape)
+    return results
+
+
+def _to_frame(result, roi, shape):
+    """Shift a crop's boxes to frame coordinates and drop those centred outside the polygon"""
+    x1, y1, _, _ = roi.bounds(shape)
+    raw = result.boxes.data
+    data = np.array(raw.cpu().numpy(), dtype=np.float32)
+    data[:, [0, 2]] += x1
+    data[:, [1, 3]] += y1
+    keep = [roi.contains((bx1 + bx2) / 2, (by1 + by2) / 2) for bx1, by1, bx2, by2 in data[:, :4]]
+    result.orig_shape = shape[:2]
+    result.boxes = type(result.boxes)(raw.new_tensor(data[np.array(keep, dtype=bool)]), result.orig_shape)
@@ -0,0 +1,166 @@
+"""Response encodings for analysis results, negotiated per request.
+
+Accept picks the format: JSON (default; serialised with orjson when installed), or
+MessagePack (application/msgpack) / CBOR (application/cbor) when their packages are
+installed. Binary formats carry images as raw PNG bytes instead of base64 data URIs.
+Accept-Encoding picks compression: brotli (br, when installed) or gzip.
+"""
+import base64
+import gzip
+import json
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from fastapi.responses import Response
+
+from metrics import stage
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed
+COMPRESS_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", "5"))
+BROTLI_QUALITY = int(os.getenv("RESPONSE_BROTLI_QUALITY", "4"))
+
+MEDIA_TYPES = {
+    "json": "application/json",
+    "msgpack": "application/msgpack",
+    "cbor": "application/cbor",
+}
+_ACCEPT_FORMATS = {
+    "application/msgpack": "msgpack",
+    "application/x-msgpack": "msgpack",
+    "application/vnd.msgpack": "msgpack",
+    "application/cbor": "cbor",
+}
+
+# (format, content encoding) negotiated for the request being handled
+_negotiated = ContextVar('crack_response_encoding', default=("json", None))
+
+
+class EncodedImage:
+    """Encoded image bytes; rendered as a data URI in JSON and as raw bytes in binary formats"""
+
+    __slots__ = ('data', 'mime', '_uri')
+
+    def __init__(self, data, mime="image/png"):
+        self.data = data
+        self.mime = mime
+        self._uri = None
+
+    def __str__(self):
+        if self._uri is None:
+            self._uri = f"data:{self.mime};base64,{base64.b64encode(self.data).decode()}"
+        return self._uri
+
+
+def _header_values(value):
+    """{token: q} for an Accept or Accept-Encoding header"""
+    values = {}
+    for part in (value or "").split(","):
+        token, _, params = part.strip().partition(";")
+        if not token:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, number = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(number)
+                except ValueError:
+                    q = 0.0
+        values[token.strip().lower()] = q
+    return values
+
+
+def negotiate(headers):
+    """(format, content encoding) for request headers; falls back to uncompressed JSON"""
+    fmt = "json"
+    best = 0.0
+    for media_type, q in _header_values(headers.get("accept")).items():
+        candidate = _ACCEPT_FORMATS.get(media_type)
+        if candidate and q > best and (msgpack if candidate == "msgpack" else cbor2) is not None:
+            fmt, best = candidate, q
+
+    # Highest q wins; q=0 means "not acceptable". br only breaks ties with gzip
+    encodings = _header_values(headers.get("accept-encoding"))
+    encoding = None
+    best = 0.0
+    for candidate in ("br", "gzip"):
+        if candidate == "br" and brotli is None:
+            continue
+        q = encodings.get(candidate, encodings.get("*", 0.0))
+        if q > best:
+            encoding, best = candidate, q
+    return fmt, encoding
+
+
+@contextmanager
+def negotiated(request):
+    """Render responses inside the block (including threadpool work) as the client asked"""
+    token = _negotiated.set(negotiate(request.headers))
+    try:
+        yield
+    finally:
+        _negotiated.reset(token)
+
+
+def _json_default(obj):
+    if isinstance(obj, EncodedImage):
+        return str(obj)
+    if hasattr(obj, "item"):  # numpy scalar
+        return obj.item()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def _binary_default(obj):
+    if isinstance(obj, EncodedImage):
+        return obj.data
+    if hasattr(obj, "item"):
+        return obj.item()
+    raise TypeError(f"Cannot serialize {type(obj).__name__}")
+
+
+def serialize(content, fmt="json"):
+    if fmt == "msgpack":
+        return msgpack.packb(content, default=_binary_default, use_bin_type=True)
+    if fmt == "cbor":
+        return cbor2.dumps(content, default=lambda encoder, obj: encoder.encode(_binary_default(obj)))
+    if orjson is not None:
+        return orjson.dumps(content, default=_json_default)
+    return json.dumps(content, default=_json_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+def render(content, status_code=200):
+    """Response for content in the format and compression negotiated for this request"""
+    fmt, encoding = _negotiated.get()
+    with stage("serialize"):
+        body = serialize(content, fmt)
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    if encoding and len(body) >= COMPRESS_MIN_BYTES:
+        with stage("compress"):
+            body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, status_code=status_code, media_type=MEDIA_TYPES[fmt], headers=headers)
@@ -0,0 +1,166 @@
+"""Ring buffer of frames in shared memory for passing decoded frames between processes.
+
+Pickling a 1080p frame through a multiprocessing.Queue copies ~6 MB twice and costs as
+much as running the detector on it. FrameRing keeps a fixed number of frame slots in one
+multiprocessing.shared_memory block; only slot numbers and small metadata go through
+queues, and both sides work on numpy views of the same memory.
+
+Handoff protocol:
+
+    producer: slot = ring.acquire()           # wait for a free slot
+              view = ring.view(slot, shape)   # decode straight into it, e.g. cap.read(view)
+              ring.publish(slot, shape, meta)
+    consumer: frame = ring.get()              # Frame, or None once the producers finished
+              ... use frame.array ...
+              ring.release(frame.slot)        # slot goes back to the producers
+
+A slot belongs to exactly one side at a time, so no locking is needed on the pixels. The
+array a consumer gets is only valid until it releases the slot; copy anything it keeps.
+
+    with FrameRing(slots=8, max_shape=(2160, 3840, 3)) as ring:
+        Process(target=decode_worker, args=(ring, path)).start()
+        ...
+
+Leaving the block unmaps the memory and, in the creating process, frees the block even if
+some frame arrays are still referenced.
+
+Pass the ring to child processes as a Process argument (its queues can only be shared by
+inheritance); the children attach to the same shared memory block by name.
+"""
+import multiprocessing
+import queue
+import sys
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# 4K BGR frames fit by default
+DEFAULT_MAX_SHAPE = (2160, 3840, 3)
+
+
+class Frame:
+    __slots__ = ('slot', 'array', 'seq', 'meta')
+
+    def __init__(self, slot, array, seq, meta):
+        self.slot = slot
+        self.array = array
+        self.seq = seq
+        self.meta = meta
+
+
+def _attach(name):
+    # Python 3.13+ can attach without registering with the resource tracker, which would
+    # otherwise try to unlink the block when an unrelated attaching process exits
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+
+class FrameRing:
+    """Fixed pool of frame slots in shared memory with free and ready queues"""
+
+    def __init__(self, slots=8, max_shape=DEFAULT_MAX_SHAPE, dtype=np.uint8, context=None):
+        context = context or multiprocessing.get_context()
+        self.slots = slots
+        self.dtype = np.dtype(dtype)
+        self.slot_bytes = int(np.prod(max_shape)) * self.dtype.itemsize
+        self._shm = shared_memory.SharedMemory(create=True, size=self.slot_bytes * slots)
+        self.name = self._shm.name
+        self._owner = True
+        self._bytes = None
+        self._free = context.Queue()
+        self._ready = context.Queue()
+        for slot in range(slots):
+            self._free.put(slot)
+        self._seq = context.Value('q', 0)  # shared, so sequence numbers stay unique across producers
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_shm']
+        state['_owner'] = False
+        state['_bytes'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._shm = _attach(self.name)
+
+    def view(self, slot, shape):
+        """numpy array over a slot's memory; writing to it writes the shared frame"""
+        size = int(np.prod(shape)) * self.dtype.itemsize
+        if size > self.slot_bytes:
+            raise ValueError(f"Frame of shape {tuple(shape)} does not fit a {self.slot_bytes}-byte slot")
+        # Slice one cached array over the block so close() has a single buffer export to drop
+        if self._bytes is None:
+            self._bytes = np.ndarray(self.slot_bytes * self.slots, dtype=np.uint8, buffer=self._shm.buf)
+        offset = slot * self.slot_bytes
+        return self._bytes[offset:offset + size].view(self.dtype).reshape(shape)
+
+    # Producer side
+
+    def acquire(self, timeout=None):
+        """Take a free slot, waiting until a consumer releases one; None on timeout"""
+        try:
+            return self._free.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def publish(self, slot, shape, meta=None):
+        """Hand a filled slot to the consumers"""
+        with self._seq.get_lock():
+            self._seq.value += 1
+            seq = self._seq.value
+        self._ready.put((slot, tuple(shape), seq, meta))
+
+    def put(self, frame, meta=None, timeout=None):
+        """Copy an existing array into a free slot and publish it; False on timeout"""
+        slot = self.acquire(timeout)
+        if slot is None:
+            return False
+        self.view(slot, frame.shape)[...] = frame
+        self.publish(slot, frame.shape, meta)
+        return True
+
+    def finish(self, consumers=1):
+        """Tell each consumer that no more frames are coming"""
+        for _ in range(consumers):
+            self._ready.put(None)
+
+    # Consumer side
+
+    def get(self, timeout=None):
+        """Next published Frame; None once the producers finished. Raises queue.Empty on timeout"""
+        item = self._ready.get(timeout=timeout)
+        if item is None:
+            return None
+        slot, shape, seq, meta = item
+        return Frame(slot, self.view(slot, shape), seq, meta)
+
+    def release(self, slot):
+        """Return a slot to the producers once its frame is no longer needed"""
+        self._free.put(slot)
+
+    # Lifetime
+
+    def close(self):
+        """Unmap the shared memory in this process; views into it must no longer be used.
+
+        Can raise BufferError while frame arrays from view() or get() are still referenced.
+        """
+        self._bytes = None
+        self._shm.close()
+
+    def unlink(self):
+        """Free the shared memory block; call once, from the creating process"""
+        if self._owner:
+            self._owner = False
+            self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            self.close()
+        finally:
+            self.unlink()
@@ -0,0 +1,239 @@
+"""Inspection history: every analysis result in an indexed SQLite store.
+
+Handlers hand rows to record(), which only enqueues them; a writer thread commits them in
+batched transactions, so requests never wait on the disk. If the queue is full (the disk
+cannot keep up), rows are dropped and counted rather than slowing requests down.
+"""
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from metrics import HISTORY_ROWS_DROPPED, QUEUE_DEPTH
+
+# SQLite file for the history store; empty disables recording
+HISTORY_DB = os.getenv("HISTORY_DB", "history.db")
+# Rows per write transaction, and the longest a row waits before it is committed
+HISTORY_BATCH_SIZE = int(os.getenv("HISTORY_BATCH_SIZE", "500"))
+HISTORY_FLUSH_SECONDS = float(os.getenv("HISTORY_FLUSH_SECONDS", "1.0"))
+# Rows allowed to wait for the writer before new ones are dropped
+HISTORY_QUEUE_MAX = int(os.getenv("HISTORY_QUEUE_MAX", "50000"))
+
+SUMMARY_GROUPS = ("crack_type", "site", "source", "day", "model_version")
+
+COLUMNS = (
+    "created_at", "site", "source", "filename", "image_hash", "frame", "cracked", "crack_type",
+    "confidence", "num_detections", "detections", "model_version",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS inspections (
+    id INTEGER PRIMARY KEY,
+    created_at REAL NOT NULL,
+    site TEXT,
+    source TEXT NOT NULL,
+    filename TEXT,
+    image_hash TEXT,
+    frame INTEGER,
+    cracked INTEGER NOT NULL,
+    crack_type TEXT,
+    confidence REAL,
+    num_detections INTEGER NOT NULL DEFAULT 0,
+    detections TEXT,
+    model_version TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_inspections_created ON inspections (created_at);
+CREATE INDEX IF NOT EXISTS idx_inspections_site ON inspections (site, created_at);
+CREATE INDEX IF NOT EXISTS idx_inspections_type ON inspections (crack_type, created_at);
+CREATE INDEX IF NOT EXISTS idx_inspections_hash ON inspections (image_hash);
+"""
+
+# Group expressions for summary(); values are fixed strings, never user input
+_GROUP_EXPRESSIONS = {
+    "crack_type": "crack_type",
+    "site": "site",
+    "source": "source",
+    "day": "strftime('%Y-%m-%d', created_at, 'unixepoch')",
+    "model_version": "model_version",
+}
+
+
+def history_row(source, cracked, crack_type=None, confidence=None, detections=None, site=None,
+                filename=None, image_hash=None, frame=None, model_version=None):
+    """One history row; detections is the list of box dicts from the response"""
+    detections = detections or []
+    return (
+        time.time(), site, source, filename, image_hash, frame, int(bool(cracked)), crack_type,
+        confidence, len(detections), json.dumps(detections) if detections else None, model_version,
+    )
+
+
+class HistoryStore:
+    def __init__(self, path, batch_size=HISTORY_BATCH_SIZE, flush_seconds=HISTORY_FLUSH_SECONDS,
+                 queue_max=HISTORY_QUEUE_MAX):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._queue = queue.Queue(maxsize=queue_max)
+        self._local = threading.local()
+        self._depth = QUEUE_DEPTH.labels('history')
+
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+        self._writer = threading.Thread(target=self._write_loop, name="history-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def _connect(self):
+        # WAL lets readers run while the writer commits, also across server worker processes
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _reader(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    # Writing
+
+    def record(self, rows):
+        """Queue rows for the writer; never blocks"""
+        for row in rows:
+            try:
+                self._queue.put_nowait(row)
+            except queue.Full:
+                HISTORY_ROWS_DROPPED.inc()
+                continue
+            self._depth.inc()
+
+    def _write_loop(self):
+        conn = self._connect()
+        insert = f"INSERT INTO inspections ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+        while True:
+            batch = [self._queue.get()]
+            if batch[0] is None:
+                return
+            deadline = time.monotonic() + self.flush_seconds
+            stop = False
+            while len(batch) < self.batch_size:
+                try:
+                    row = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if row is None:
+                    stop = True
+                    break
+                batch.append(row)
+            try:
+                with conn:
+                    conn.executemany(insert, batch)
+            except sqlite3.Error as e:
+                HISTORY_ROWS_DROPPED.inc(len(batch))
+                print(f"History write failed, {len(batch)} rows lost: {e}")
+            self._depth.dec(len(batch))
+            if stop:
+                return
+
+    def close(self):
+        """Commit queued rows and stop the writer"""
+        if self._writer.is_alive():
+            try:
+                self._queue.put(None, timeout=10)
+            except queue.Full:
+                return
+            self._writer.join(timeout=10)
+
+    # Reading
+
+    @staticmethod
+    def _filters(site=None, crack_type=None, cracked=None, source=None, since=None, until=None, image_hash=None):
+        clauses, params = [], []
+        for column, value in (("site", site), ("crack_type", crack_type), ("source", source),
+                              ("image_hash", image_hash)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if cracked is not None:
+            clauses.append("cracked = ?")
+            params.append(int(cracked))
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("created_at < ?")
+            params.append(until)
+        return clauses, params
+
+    def query(self, limit=50, cursor=None, **filters):
+        """Newest rows first; pass the returned next_cursor to get the following page"""
+        clauses, params = self._filters(**filters)
+        if cursor is not None:
+            clauses.append("id < ?")
+            params.append(cursor)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._reader().execute(
+            f"SELECT * FROM inspections {where} ORDER BY id DESC LIMIT ?", params + [limit + 1]
+        ).fetchall()
+        items = []
+        for row in rows[:limit]:
+            item = dict(row)
+            item["cracked"] = bool(item["cracked"])
+            item["detections"] = json.loads(item["detections"]) if item["detections"] else []
+            items.append(item)
+        next_cursor = items[-1]["id"] if len(rows) > limit else None
+        return {"items": items, "next_cursor": next_cursor}
+
+    def summary(self, group_by="crack_type", **filters):
+        """Counts of analysed and cracked items per group"""
+        clauses, params = self._filters(**filters)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        expression = _GROUP_EXPRESSIONS[group_by]
+        rows = self._reader().execute(
+            f"SELECT {expression} AS grp, COUNT(*) AS total, SUM(cracked) AS cracked, "
+            f"SUM(num_detections) AS detections, MIN(created_at) AS first_at, MAX(created_at) AS last_at "
+            f"FROM inspections {where} GROUP BY grp ORDER BY total DESC",
+            params,
+        ).fetchall()
+        groups = [
+            {group_by: row["grp"], "total": row["total"], "cracked": row["cracked"] or 0,
+             "detections": row["detections"] or 0, "first_at": row["first_at"], "last_at": row["last_at"]}
+            for row in rows
+        ]
+        return {
+            "group_by": group_by,
+            "total": sum(g["total"] for g in groups),
+            "cracked": sum(g["cracked"] for g in groups),
+            "groups": groups,
+        }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """The process-wide store, opened on first use; None when HISTORY_DB is empty"""
+    global _store
+    if _store is None and HISTORY_DB:
+        with _store_lock:
+            if _store is None:
+                _store = HistoryStore(HISTORY_DB)
+    return _store
+
+
+def enabled():
+    """False when HISTORY_DB is empty; handlers then skip building rows and hashing inputs"""
+    return bool(HISTORY_DB)
+
+
+def record(rows):
+    store = get_store()
+    if store is not None and rows:
+        store.record(rows)
@@ -0,0 +1,72 @@
+"""Inspection history endpoints: paginated results and aggregate counts.
+
+Served in every role; queries read the SQLite store directly and never run inference.
+"""
+from datetime import datetime
+
+from fastapi import APIRouter, HTTPException, Query
+from starlette.concurrency import run_in_threadpool
+
+import history
+
+router = APIRouter()
+
+ADMISSION_ROUTES = {}
+METRIC_ENDPOINTS = {
+    "/history": "history",
+    "/history/summary": "history_summary",
+}
+PROFILE_PATHS = []
+RESPONSE_HEADERS = []
+
+
+def _store():
+    store = history.get_store()
+    if store is None:
+        raise HTTPException(status_code=404, detail="Inspection history is disabled (HISTORY_DB is empty)")
+    return store
+
+
+def _filters(site, crack_type, cracked, source, since, until, image_hash=None):
+    return {
+        "site": site, "crack_type": crack_type, "cracked": cracked, "source": source,
+        "since": since.timestamp() if since else None,
+        "until": until.timestamp() if until else None,
+        "image_hash": image_hash,
+    }
+
+
+@router.get("/history")
+async def history_query(
+    site: str = Query(None),
+    crack_type: str = Query(None, description="Orientation label, e.g. Vertical Crack"),
+    cracked: bool = Query(None),
+    source: str = Query(None, description="predict, zip or video"),
+    since: datetime = Query(None, description="ISO date/time, inclusive"),
+    until: datetime = Query(None, description="ISO date/time, exclusive"),
+    image_hash: str = Query(None, description="SHA-256 of the image (or video) file"),
+    limit: int = Query(50, ge=1, le=1000),
+    cursor: int = Query(None, description="next_cursor from the previous page"),
+):
+    """Stored analysis results, newest first"""
+    store = _store()
+    filters = _filters(site, crack_type, cracked, source, since, until, image_hash)
+    return await run_in_threadpool(store.query, limit=limit, cursor=cursor, **filters)
+
+
+@router.get("/history/summary")
+async def history_summary(
+    group_by: str = Query("crack_type", description=f"One of {', '.join(history.SUMMARY_GROUPS)}"),
+    site: str = Query(None),
+    crack_type: str = Query(None),
+    cracked: bool = Query(None),
+    source: str = Query(None),
+    since: datetime = Query(None),
+    until: datetime = Query(None),
+):
+    """Analysed and cracked counts per group, e.g. vertical cracks this month at one site"""
+    if group_by not in history.SUMMARY_GROUPS:
+        raise HTTPException(status_code=400, detail=f"group_by must be one of {', '.join(history.SUMMARY_GROUPS)}")
+    store = _store()
+    filters = _filters(site, crack_type, cracked, source, since, until)
+    return await run_in_threadpool(store.summary, group_by=group_by, **filters)
@@ -0,0 +1,882 @@
+"""Inference role: detection, classification, video and live-stream endpoints.
+
+Importing this module loads the models (ultralytics/torch and TensorFlow) through
+ModelLoader. api_v_2_3 only imports it when API_ROLE includes inference.
+"""
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, FileResponse
+from PIL import Image
+import numpy as np
+import cv2
+from io import BytesIO
+from model_registry import ModelRegistry, MODEL_WATCH_INTERVAL
+from profiling import is_admin, profiled
+import hashlib
+import uuid
+import os
+import zipfile
+import shutil
+import time
+import asyncio
+from starlette.concurrency import run_in_threadpool
+from metrics import (
+    stage, record_detections, record_frame, record_cache_hit, record_prefilter_skip, bind_endpoint,
+    STREAM_FRAMES_DROPPED
+)
+from admission import max_upload_bytes
+from spool import FILE_UPLOAD_BODY, check_upload_size, spool_request_file
+from dedup import DuplicateIndex, dhash_file
+from cancellation import RequestCancelled, cancellable, cancelled_error
+from tracker import IouTracker
+import video_output
+from prefilter import DEFAULT_PREFILTER_THRESHOLD, crack_score, crack_score_file
+from encoding import EncodedImage, negotiated, render
+from buffer_pool import draw_buffers
+from detection import (
+    DetectionParams, RoiError, detect, detection_params, current_params, parse_roi,
+    DETECT_CONF, DETECT_IOU, DETECT_MAX_DET
+)
+import history
+from history import history_row
+
+router = APIRouter()
+
+# Endpoint class per path for admission control (see admission.py)
+ADMISSION_ROUTES = {
+    "/predict": "single",
+    "/zip_upload": "batch",
+    "/video": "video",
+}
+
+# Metric endpoint label per path (see metrics.MetricsMiddleware)
+METRIC_ENDPOINTS = {
+    "/predict": "predict",
+    "/zip_upload": "zip_upload",
+    "/video": "video",
+}
+
+# Paths that honour X-Profile (see profiling.ProfilingMiddleware)
+PROFILE_PATHS = ["/predict", "/zip_upload", "/video"]
+
+# Extra response headers browsers may read (CORS expose_headers)
+RESPONSE_HEADERS = ["X-Model-Version"]
+
+# Serving models; POST /admin/models/reload or MODEL_WATCH_INTERVAL swaps in new versions.
+# Handlers run inference in the threadpool; detector calls are serialised per model set
+# while decode/draw/encode overlap.
+models = ModelRegistry()
+if MODEL_WATCH_INTERVAL > 0:
+    models.watch(MODEL_WATCH_INTERVAL)
+
+orientation_labels = {
+    0: "Horizontal Crack",
+    1: "Vertical Crack",
+    2: "Unprecidented Crack"
+}
+
+# output= option on /video: "frames" returns changed frames as HTML image snippets,
+# "video" writes one annotated MP4 and returns a compact track event list
+VIDEO_OUTPUTS = ("frames", "video")
+
+# images= option on /predict and /zip_upload: "none" skips all drawing and encoding,
+# "annotated" returns only the full annotated image, "all" also returns one image per box
+IMAGE_MODES = ("none", "annotated", "all")
+
+# Box colours (BGR) for annotated images and videos, cycled per box or track
+BOX_COLORS = [
+    (255, 0, 0), (0, 255, 0), (0, 0, 255),
+    (255, 255, 0), (255, 0, 255), (0, 255, 255),
+    (128, 0, 128), (0, 128, 128), (128, 128, 0), (0, 0, 0),
+]
+# zlib level for annotated PNGs: 3 is ~2.7x faster than PIL's default 6 for ~2% more bytes
+PNG_COMPRESSION = int(os.getenv("PNG_COMPRESSION", "3"))
+
+
+def pil_to_image(pil_img):
+    """PNG-encoded image for a response (data URI in JSON, raw bytes in binary formats)"""
+    buffered = BytesIO()
+    pil_img.save(buffered, format="PNG")
+    return EncodedImage(buffered.getvalue())
+
+
+def pil_to_base64(pil_img):
+    return str(pil_to_image(pil_img))
+
+
+def bgr_to_image(image_np):
+    """PNG-encoded image straight from an OpenCV BGR array, without an RGB copy"""
+    ok, png = cv2.imencode(".png", image_np, [cv2.IMWRITE_PNG_COMPRESSION, PNG_COMPRESSION])
+    if not ok:
+        raise ValueError("PNG encoding failed")
+    return EncodedImage(png.tobytes())
+
+
+def iou(box1, box2):
+    """Calculate Intersection over Union for two bounding boxes."""
+    x1, y1, w1, h1 = box1
+    x2, y2, w2, h2 = box2
+
+    # Convert to (x1, y1, x2, y2)
+    box1 = [x1, y1, x1 + w1, y1 + h1]
+    box2 = [x2, y2, x2 + w2, y2 + h2]
+
+    xi1 = max(box1[0], box2[0])
+    yi1 = max(box1[1], box2[1])
+    xi2 = min(box1[2], box2[2])
+    yi2 = min(box1[3], box2[3])
+    inter_area = max(0, xi2 - xi1) * max(0, yi2 - yi1)
+
+    box1_area = (box1[2] - box1[0]) * (box1[3] - box1[1])
+    box2_area = (box2[2] - box2[0]) * (box2[3] - box2[1])
+    union_area = box1_area + box2_area - inter_area
+
+    return inter_area / union_area if union_area != 0 else 0
+
+def are_different_cracks(prev_boxes, curr_boxes, iou_thresh=0.5):
+    """Returns True if current cracks are different from previous cracks."""
+    if not prev_boxes and curr_boxes:
+        return True
+    for cb in curr_boxes:
+        if all(iou(cb, pb) < iou_thresh for pb in prev_boxes):
+            return True
+    return False
+
+def draw_yolo_boxes_separately(image_np, yolo_results, individual=True):
+    """Annotated frame and, with individual=True, one image per box; image_np is left untouched.
+
+    Everything is drawn in place on one pooled BGR buffer and PNG-encoded straight from BGR:
+    each per-box image is encoded and then only the pixels under its rectangle are restored.
+    """
+    detections = yolo_results[0].boxes.data.cpu().numpy()
+    boxes = [tuple(map(int, det[:4])) for det in detections]
+
+    with draw_buffers.lease(image_np.shape) as canvas:
+        with stage("draw"):
+            np.copyto(canvas, image_np)
+
+        individual_bboxes_b64 = []
+        if individual:
+            for i, (x1, y1, x2, y2) in enumerate(boxes):
+                with stage("draw"):
+                    cv2.rectangle(canvas, (x1, y1), (x2, y2), BOX_COLORS[i % len(BOX_COLORS)], 2)
+                with stage("encode"):
+                    individual_bboxes_b64.append(bgr_to_image(canvas))
+                with stage("draw"):
+                    restore_box(canvas, image_np, x1, y1, x2, y2)
+
+        with stage("draw"):
+            for i, (x1, y1, x2, y2) in enumerate(boxes):
+                color = BOX_COLORS[i % len(BOX_COLORS)]
+                cv2.rectangle(canvas, (x1, y1), (x2, y2), color, 2)
+                cv2.putText(canvas, f"Crack {i+1}", (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1)
+        with stage("encode"):
+            full_img_b64 = bgr_to_image(canvas)
+
+    return full_img_b64, individual_bboxes_b64
+
+
+def restore_box(canvas, image_np, x1, y1, x2, y2, pad=2):
+    """Copy back the four edge strips a rectangle of thickness <= 2 * pad drew over"""
+    for top, bottom, left, right in (
+        (y1 - pad, y1 + pad + 1, x1 - pad, x2 + pad + 1),
+        (y2 - pad, y2 + pad + 1, x1 - pad, x2 + pad + 1),
+        (y1 - pad, y2 + pad + 1, x1 - pad, x1 + pad + 1),
+        (y1 - pad, y2 + pad + 1, x2 - pad, x2 + pad + 1),
+    ):
+        rows = slice(max(top, 0), max(bottom, 0))
+        cols = slice(max(left, 0), max(right, 0))
+        canvas[rows, cols] = image_np[rows, cols]
+
+
+def preprocess_image_from_pil(pil_img, target_size=(227, 227)):
+    """Preprocess image from PIL Image object"""
+    img = pil_img.convert('L').resize(target_size)
+    # (1, h, w, 1) float32, the layout keras' img_to_array + expand_dims produced
+    return np.asarray(img, dtype=np.float32)[np.newaxis, :, :, np.newaxis]
+
+def preprocess_box_crops(frame, boxes, target_size=(227, 227)):
+    """Grayscale crop of every xyxy box, resized together into one (n, 227, 227, 1) batch"""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    h, w = gray.shape
+    batch = np.empty((len(boxes), target_size[1], target_size[0], 1), dtype=np.float32)
+    for i, (x1, y1, x2, y2) in enumerate(boxes):
+        x1, y1 = min(max(int(x1), 0), w - 1), min(max(int(y1), 0), h - 1)
+        x2, y2 = max(min(int(x2), w), x1 + 1), max(min(int(y2), h), y1 + 1)
+        crop = gray[y1:y2, x1:x2]
+        # Area averaging when shrinking, like PIL's antialiased resize; cubic when enlarging small boxes
+        shrinking = crop.shape[0] * crop.shape[1] >= target_size[0] * target_size[1]
+        batch[i, :, :, 0] = cv2.resize(crop, target_size, interpolation=cv2.INTER_AREA if shrinking else cv2.INTER_CUBIC)
+    return batch
+
+
+def add_box_orientations(detections, preds):
+    """Attach the orientation label and confidence predicted for each box"""
+    for detection, pred in zip(detections, preds):
+        detection["orientation"] = orientation_labels.get(int(np.argmax(pred)), "Unknown")
+        detection["orientation_confidence"] = round(float(np.max(pred)), 4)
+
+
+def extract_detections(yolo_results):
+    """Boxes from a detector result as plain dicts: xyxy, confidence, class id and name"""
+    names = getattr(models.active().detector, "names", None) or {}
+    detections = []
+    for x1, y1, x2, y2, conf, cls in yolo_results[0].boxes.data.cpu().numpy()[:, :6].tolist():
+        detections.append({
+            "xyxy": [round(x1, 1), round(y1, 1), round(x2, 1), round(y2, 1)],
+            "confidence": round(conf, 4),
+            "class_id": int(cls),
+            "class": names.get(int(cls), str(int(cls))),
+        })
+    return detections
+
+
+def check_image_mode(images):
+    if images not in IMAGE_MODES:
+        raise HTTPException(status_code=400, detail=f"images must be one of {', '.join(IMAGE_MODES)}")
+
+
+def detect_cracks(frame):
+    """Run the crack detector on a BGR frame with the request's detection settings"""
+    active = models.active()
+    try:
+        with active.detector_lock, stage("detect"):
+            return detect(active.detector, frame)
+    except RoiError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def detection_query(
+    conf: float = Query(DETECT_CONF, ge=0, le=1, description="Minimum box confidence"),
+    iou: float = Query(DETECT_IOU, ge=0, le=1, description="NMS IoU threshold"),
+    max_det: int = Query(DETECT_MAX_DET, ge=1, le=1000, description="Maximum boxes per image/frame"),
+    roi: str = Query(None, max_length=4000, description="Region of interest polygon x1,y1,x2,y2,x3,y3,... in pixels"),
+):
+    """Detection settings shared by /predict, /zip_upload and /video"""
+    try:
+        return DetectionParams(conf, iou, max_det, parse_roi(roi))
+    except RoiError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def classify_orientation(img_array):
+    """Run the orientation classifier on a preprocessed batch"""
+    return models.active().classifier.predict(img_array)
+
+
+def with_model_version(response, active):
+    """Tag a response with the versions of the models that produced it"""
+    response.headers["X-Model-Version"] = active.version
+    return response
+
+
+@router.post("/predict")
+async def predict(
+    request: Request,
+    file: UploadFile = File(...),
+    images: str = Query("all", description="Images to return: none, annotated or all"),
+    per_box: bool = Query(False, description="Also classify the orientation of each detected box"),
+    site: str = Query(None, max_length=200, description="Site tag stored with the result in the inspection history"),
+    detection: DetectionParams = Depends(detection_query),
+):
+    check_image_mode(images)
+    contents = await file.read()
+    with models.pinned() as active, negotiated(request), detection_params(detection):
+        return with_model_version(
+            await run_in_threadpool(profiled(predict_image_bytes), contents, images, per_box, site, file.filename), active
+        )
+
+
+def predict_image_bytes(contents, images="all", per_box=False, site=None, filename=None):
+    with stage("decode"):
+        np_img = np.frombuffer(contents, np.uint8)
+        frame = cv2.imdecode(np_img, cv2.IMREAD_COLOR)
+    if frame is None:
+        raise HTTPException(status_code=400, detail="Invalid image format")
+
+    yolo_results = detect_cracks(frame)
+    cracked = len(yolo_results[0].boxes) > 0
+    record_detections(len(yolo_results[0].boxes))
+
+    if cracked:
+        detections = extract_detections(yolo_results)
+        with stage("classify"):
+            pil_img = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            img_array = preprocess_image_from_pil(pil_img)
+            if per_box:
+                # Whole frame and every box crop in a single classifier call
+                img_array = np.concatenate([img_array, preprocess_box_crops(frame, yolo_results[0].boxes.xyxy.cpu().numpy())])
+            preds = classify_orientation(img_array)
+        pred = preds[0]
+        if per_box:
+            add_box_orientations(detections, preds[1:])
+        label = orientation_labels.get(np.argmax(pred), "Unknown")
+        confidence = float(np.max(pred))  # Get the highest confidence score
+        full_img_b64, separate_bboxes_b64 = None, []
+        if images != "none":
+            full_img_b64, separate_bboxes_b64 = draw_yolo_boxes_separately(
+                frame, yolo_results, individual=images == "all"
+            )
+        result = {
+            "cracked": True,
+            "orientation": label,
+            "confidence": confidence,
+            "annotated_image": full_img_b64,
+            "individual_bboxes": separate_bboxes_b64,
+            "detections": detections
+        }
+    else:
+        result = {"cracked": False, "orientation": None, "confidence": 0.0, "annotated_image": None,
+                  "individual_bboxes": [], "detections": []}
+    result["model_version"] = models.active().version
+
+    if history.enabled():
+        history.record([history_row(
+            "predict", result["cracked"], result["orientation"], result["confidence"], result["detections"],
+            site=site, filename=filename, image_hash=hashlib.sha256(contents).hexdigest(),
+            model_version=result["model_version"],
+        )])
+    return render(result)
+
+
+@router.post("/zip_upload")
+async def zip_upload(
+    request: Request,
+    file: UploadFile = File(...),
+    dedup: bool = Query(False, description="Run inference once per group of near-identical images"),
+    dedup_distance: int = Query(5, ge=0, le=64, description="Max dHash Hamming distance for two images to count as duplicates"),
+    prefilter: bool = Query(False, description="Skip detection on images the cheap edge check rules out"),
+    prefilter_threshold: float = Query(DEFAULT_PREFILTER_THRESHOLD, ge=0, le=1),
+    images: str = Query("all", description="Images to return: none, annotated or all"),
+    per_box: bool = Query(False, description="Also classify the orientation of each detected box"),
+    site: str = Query(None, max_length=200, description="Site tag stored with the results in the inspection history"),
+    detection: DetectionParams = Depends(detection_query),
+):
+    check_image_mode(images)
+    if not file.filename.endswith('.zip'):
+        raise HTTPException(status_code=400, detail="File must be a zip archive")
+    
+    temp_dir = f"temp_{uuid.uuid4()}"
+    os.makedirs(temp_dir, exist_ok=True)
+    try:
+        async with cancellable(request, "batch") as cancel:
+            # Starlette has already spooled the archive to disk; read it in place
+            check_upload_size(file, max_upload_bytes("batch"))
+            with models.pinned() as active, negotiated(request), detection_params(detection):
+                response = await run_in_threadpool(
+                    profiled(process_zip), temp_dir, file.file,
+                    dedup_distance if dedup else None, prefilter_threshold if prefilter else None, images, per_box,
+                    cancel, site
+                )
+            return with_model_version(response, active)
+    except RequestCancelled as e:
+        raise cancelled_error(e, cancel)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def process_zip(temp_dir, zip_file, dedup_distance=None, prefilter_threshold=None, images="all", per_box=False,
+                cancel=None, site=None):
+    """Analyse every image in the archive; with dedup_distance set, near-duplicates reuse their group's result"""
+    with stage("extract"), zipfile.ZipFile(zip_file, 'r') as zip_ref:
+        zip_ref.extractall(temp_dir)
+        extracted_files = zip_ref.namelist()
+
+    results = []
+    rows = []
+    model_version = models.active().version
+    duplicates = DuplicateIndex(dedup_distance) if dedup_distance is not None else None
+    keep_history = history.enabled()
+
+    for filename in extracted_files:
+        if filename.lower().endswith(('.png', '.jpg', '.jpeg')):
+            if cancel is not None:
+                cancel.check()
+            img_path = os.path.join(temp_dir, filename)
+
+            leader = None
+            if duplicates is not None:
+                with stage("dedup"):
+                    image_hash = dhash_file(img_path)
+                if image_hash is None:
+                    continue
+                leader = duplicates.find(image_hash)
+
+            if leader is not None:
+                record_cache_hit("dedup")
+                result = dict(leader, filename=filename, duplicate_of=leader["filename"],
+                              input_image=input_image_uri(img_path, images))
+            else:
+                result = analyze_zip_image(img_path, filename, prefilter_threshold, images, per_box)
+                if result is None:
+                    continue
+                if duplicates is not None:
+                    duplicates.add(image_hash, result)
+
+            results.append(result)
+            if keep_history:
+                rows.append(history_row(
+                    "zip", result["cracked"], result["orientation"], detections=result["detections"], site=site,
+                    filename=filename, image_hash=file_sha256(img_path), model_version=model_version,
+                ))
+
+    history.record(rows)
+    return render(results)
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def input_image_uri(img_path, images):
+    """The uploaded image (data URI in JSON) for images=all, otherwise None"""
+    if images != "all":
+        return None
+    with stage("encode"), open(img_path, "rb") as f:
+        mime = "image/png" if img_path.lower().endswith(".png") else "image/jpeg"
+        return EncodedImage(f.read(), mime)
+
+
+def analyze_zip_image(img_path, filename, prefilter_threshold=None, images="all", per_box=False):
+    """Detect and classify one extracted image; None if it cannot be decoded"""
+    if prefilter_threshold is not None:
+        with stage("prefilter"):
+            score = crack_score_file(img_path)
+        if score is None:
+            return None
+        if score < prefilter_threshold:
+            record_prefilter_skip()
+            return {
+                "filename": filename,
+                "input_image": input_image_uri(img_path, images),
+                "cracked": False,
+                "orientation": None,
+                "annotated_image": None,
+                "separate_bounding_box_images": [],
+                "detections": [],
+                "duplicate_of": None,
+                "prefiltered": True
+            }
+
+    with stage("decode"):
+        frame = cv2.imread(img_path)
+    if frame is None:
+        return None
+
+    yolo_results = detect_cracks(frame)
+    cracked = len(yolo_results[0].boxes) > 0
+    record_detections(len(yolo_results[0].boxes))
+
+    result = {
+        "filename": filename,
+        "input_image": input_image_uri(img_path, images),
+        "cracked": cracked,
+        "orientation": None,
+        "annotated_image": None,
+        "separate_bounding_box_images": [],
+        "detections": extract_detections(yolo_results),
+        "duplicate_of": None,
+        "prefiltered": False
+    }
+
+    if cracked:
+        with stage("classify"):
+            pil_img = Image.open(img_path).convert("RGB")
+            img_array = preprocess_image_from_pil(pil_img)
+            if per_box:
+                img_array = np.concatenate([img_array, preprocess_box_crops(frame, yolo_results[0].boxes.xyxy.cpu().numpy())])
+            preds = classify_orientation(img_array)
+        pred = preds[0]
+        if per_box:
+            add_box_orientations(result["detections"], preds[1:])
+        label = orientation_labels.get(np.argmax(pred), "Unknown")
+        result["orientation"] = label
+        if images != "none":
+            full_img_b64, separate_bboxes_b64 = draw_yolo_boxes_separately(
+                frame, yolo_results, individual=images == "all"
+            )
+            result["annotated_image"] = full_img_b64
+            result["separate_bounding_box_images"] = separate_bboxes_b64
+
+    return result
+    
+
+@router.post("/video", openapi_extra=FILE_UPLOAD_BODY)
+async def video(
+    request: Request,
+    prefilter: bool = Query(False, description="Skip detection on frames the cheap edge check rules out"),
+    prefilter_threshold: float = Query(DEFAULT_PREFILTER_THRESHOLD, ge=0, le=1),
+    output: str = Query("frames", description="frames (HTML image snippets) or video (annotated MP4 + events)"),
+    site: str = Query(None, max_length=200, description="Site tag stored with the results in the inspection history"),
+    detection: DetectionParams = Depends(detection_query),
+):
+    if output not in VIDEO_OUTPUTS:
+        raise HTTPException(status_code=400, detail=f"output must be one of {', '.join(VIDEO_OUTPUTS)}")
+
+    # Stream the video straight to disk before the disconnect watcher starts reading the request
+    upload = await spool_request_file(
+        request, extensions=('.mp4', '.avi', '.mov'), max_bytes=max_upload_bytes("video")
+    )
+    try:
+        async with cancellable(request, "video") as cancel:
+            with negotiated(request), detection_params(detection):
+                return await process_video(upload, prefilter_threshold if prefilter else None, cancel, output, site)
+    except RequestCancelled as e:
+        raise cancelled_error(e, cancel)
+    except HTTPException:
+        raise
+    except RoiError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        upload.remove()
+
+
+async def process_video(upload, prefilter_threshold=None, cancel=None, output="frames", site=None):
+    tags = {"site": site, "filename": upload.filename, "image_hash": upload.sha256}
+    with upload, models.pinned() as active:
+        if output == "video":
+            response = await run_in_threadpool(profiled(annotate_video), upload.path, prefilter_threshold, cancel, tags)
+        else:
+            response = await run_in_threadpool(profiled(scan_video), upload.path, prefilter_threshold, cancel, tags)
+    return with_model_version(response, active)
+
+
+def track_event(event, track, frame_num, fps=None):
+    entry = {
+        "event": event,
+        "frame": frame_num,
+        "track_id": track.track_id,
+        "xyxy": [round(float(v), 1) for v in track.box],
+        "confidence": round(track.confidence, 4),
+    }
+    if fps:
+        entry["timestamp"] = round(frame_num / fps, 2)
+    if event == "track_start":
+        entry["orientation"], entry["orientation_confidence"] = track.orientation
+    else:
+        entry["frames_seen"] = track.hits
+    return entry
+
+
+def classify_new_tracks(frame, started):
+    """Orientation of every new track's crop, in one classifier call"""
+    with stage("classify"):
+        preds = classify_orientation(preprocess_box_crops(frame, np.array([track.box for track in started])))
+    for track, pred in zip(started, preds):
+        track.orientation = (orientation_labels.get(int(np.argmax(pred)), "Unknown"), round(float(np.max(pred)), 4))
+
+
+def annotate_video(temp_path, prefilter_threshold=None, cancel=None, tags=None):
+    """Track cracks across frames and write one annotated MP4; returns its id and the track events"""
+    cap = cv2.VideoCapture(temp_path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    video_id, output_file, writer = video_output.open_writer(fps, width, height)
+    tracker = IouTracker()
+    events = []
+    frame_num = 0
+    finished = False
+
+    try:
+        while True:
+            if cancel is not None:
+                cancel.check()
+            with stage("decode"):
+                ret, frame = cap.read()
+            if not ret:
+                break
+            frame_num += 1
+
+            skip = False
+            if prefilter_threshold is not None:
+                with stage("prefilter"):
+                    skip = crack_score(current_params().crop(frame)) < prefilter_threshold
+                if skip:
+                    record_prefilter_skip()
+
+            if not skip:
+                yolo_results = detect_cracks(frame)
+                data = yolo_results[0].boxes.data.cpu().numpy()
+                record_frame(len(data))
+                tracks, started, ended = tracker.update(data[:, :4], data[:, 4], frame_num)
+
+                if started:
+                    classify_new_tracks(frame, started)
+                    for track in started:
+                        events.append(track_event("track_start", track, frame_num, fps))
+                for track in ended:
+                    events.append(track_event("track_end", track, track.last_frame, fps))
+
+                with stage("draw"):
+                    for track in tracks:
+                        x1, y1, x2, y2 = map(int, track.box)
+                        color = BOX_COLORS[track.track_id % len(BOX_COLORS)]
+                        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+                        cv2.putText(frame, f"#{track.track_id}", (x1, max(y1 - 8, 12)),
+                                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1)
+
+            with stage("write_video"):
+                writer.write(frame)
+
+        for track in tracker.finish():
+            events.append(track_event("track_end", track, track.last_frame, fps))
+        finished = True
+    finally:
+        cap.release()
+        writer.release()
+        if not finished and os.path.exists(output_file):
+            os.remove(output_file)
+
+    # Ends are only known some frames later; order by frame, starts before ends
+    events.sort(key=lambda e: (e["frame"], e["event"] == "track_end", e["track_id"]))
+    # One history row per crack track, at the frame it first appeared
+    if history.enabled():
+        model_version = models.active().version
+        history.record([
+            history_row("video", True, e["orientation"], e["confidence"],
+                        [{"xyxy": e["xyxy"], "confidence": e["confidence"], "track_id": e["track_id"]}],
+                        frame=e["frame"], model_version=model_version, **(tags or {}))
+            for e in events if e["event"] == "track_start"
+        ])
+    return render({
+        "video_id": video_id,
+        "download_url": f"/video/output/{video_id}",
+        "fps": fps,
+        "width": width,
+        "height": height,
+        "frames": frame_num,
+        "tracks": sum(1 for e in events if e["event"] == "track_start"),
+        "events": events,
+        "model_version": models.active().version,
+    })
+
+
+# Live streams: at most this many WebSocket clients run inference at once
+STREAM_MAX_CONNECTIONS = int(os.getenv("STREAM_MAX_CONNECTIONS", "4"))
+active_streams = 0
+
+
+def process_stream_frame(data, seq, tracker):
+    """Detect and track one JPEG frame from a live stream; returns the message for the client"""
+    with stage("decode"):
+        frame = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    if frame is None:
+        return {"type": "error", "seq": seq, "detail": "Invalid image format"}
+
+    yolo_results = detect_cracks(frame)
+    boxes = yolo_results[0].boxes.data.cpu().numpy()
+    record_frame(len(boxes))
+    tracks, started, ended = tracker.update(boxes[:, :4], boxes[:, 4], seq)
+    if started:
+        classify_new_tracks(frame, started)
+
+    return {
+        "type": "frame",
+        "seq": seq,
+        "model_version": models.active().version,
+        "detections": [
+            {"track_id": track.track_id, "xyxy": [round(float(v), 1) for v in track.box],
+             "confidence": round(track.confidence, 4)}
+            for track in tracks
+        ],
+        "events": [track_event("track_start", track, seq) for track in started]
+                  + [track_event("track_end", track, track.last_frame) for track in ended],
+    }
+
+
+@router.websocket("/ws/stream")
+async def stream(websocket: WebSocket):
+    """Live detection on JPEG frames sent as binary messages.
+
+    When inference falls behind, only the newest waiting frame is kept (latest frame wins)
+    and the rest are counted as dropped. Every processed frame gets a JSON reply with its
+    sequence number (1-based arrival order), tracked detections, track events and server-side
+    latency. Send the text message "stop" to finish and receive a summary.
+    """
+    global active_streams
+    await websocket.accept()
+    if active_streams >= STREAM_MAX_CONNECTIONS:
+        await websocket.close(code=1013, reason="Too many live streams")  # 1013: try again later
+        return
+    active_streams += 1
+
+    latest = None  # (seq, received_at, jpeg bytes) waiting for inference
+    frame_ready = asyncio.Event()
+    counts = {"received": 0, "processed": 0, "dropped": 0}
+    finished = False
+
+    async def receive_frames():
+        nonlocal latest, finished
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message.get("bytes") is not None:
+                    counts["received"] += 1
+                    if latest is not None:
+                        counts["dropped"] += 1
+                        STREAM_FRAMES_DROPPED.inc()
+                    latest = (counts["received"], time.perf_counter(), message["bytes"])
+                    frame_ready.set()
+                elif (message.get("text") or "").strip() == "stop":
+                    break
+        finally:
+            finished = True
+            frame_ready.set()
+
+    receiver = asyncio.create_task(receive_frames())
+    tracker = IouTracker()
+    server_ms = []
+    try:
+        with bind_endpoint("stream"):
+            while latest is not None or not finished:
+                if latest is None:
+                    await frame_ready.wait()
+                    frame_ready.clear()
+                    continue
+                seq, received_at, data = latest
+                latest = None
+                started_at = time.perf_counter()
+                with models.pinned():
+                    reply = await run_in_threadpool(process_stream_frame, data, seq, tracker)
+                counts["processed"] += 1
+                reply["queue_ms"] = round((started_at - received_at) * 1000, 2)
+                reply["server_ms"] = round((time.perf_counter() - received_at) * 1000, 2)
+                reply["dropped"] = counts["dropped"]
+                server_ms.append(reply["server_ms"])
+                await websocket.send_json(reply)
+
+            server_ms.sort()
+            await websocket.send_json({
+                "type": "summary",
+                **counts,
+                "server_p50_ms": server_ms[len(server_ms) // 2] if server_ms else None,
+                "server_p95_ms": server_ms[int(len(server_ms) * 0.95)] if server_ms else None,
+                "tracks": [track_event("track_end", track, track.last_frame) for track in tracker.finish()],
+            })
+            await websocket.close()
+    except (WebSocketDisconnect, RuntimeError):
+        pass  # client went away mid-reply
+    finally:
+        receiver.cancel()
+        active_streams -= 1
+        print(f"Stream closed: {counts['received']} frames received, {counts['processed']} processed, "
+              f"{counts['dropped']} dropped")
+
+
+def require_admin(request):
+    if not is_admin(request.scope):
+        raise HTTPException(status_code=403, detail="Admin token required (X-Admin-Token)")
+
+
+@router.get("/admin/models")
+async def model_status(request: Request):
+    """Serving model versions and reload state"""
+    require_admin(request)
+    return models.status()
+
+
+@router.post("/admin/models/reload")
+async def reload_models(
+    request: Request,
+    wait: bool = Query(False, description="Respond once the new models serve instead of immediately"),
+):
+    """Load the model files again, warm them up and swap them in without dropping requests"""
+    require_admin(request)
+    if wait:
+        started, error = await run_in_threadpool(models.reload, True)
+    else:
+        started, error = models.reload()
+    if not started:
+        raise HTTPException(status_code=409, detail="A model reload is already running")
+    if error:
+        raise HTTPException(status_code=500, detail=f"Model reload failed: {error}")
+    return JSONResponse(status_code=200 if wait else 202, content=models.status())
+
+
+@router.get("/video/output/{video_id}")
+async def video_output_download(video_id: str):
+    """Download an annotated video written by /video?output=video"""
+    path = video_output.output_path(video_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Annotated video not found or expired")
+    return FileResponse(path, media_type="video/mp4", filename=f"crack_video_{video_id}.mp4")
+
+
+def scan_video(temp_path, prefilter_threshold=None, cancel=None, tags=None):
+    """Detect and classify crack changes frame by frame; returns the JSON response"""
+    report_data = []
+    rows = []
+    model_version = models.active().version
+    keep_history = history.enabled()
+    cap = cv2.VideoCapture(temp_path)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    frame_num = 0
+    prev_crack_boxes = []
+
+    try:
+        while True:
+            if cancel is not None:
+                cancel.check()
+            with stage("decode"):
+                ret, frame = cap.read()
+            if not ret:
+                break
+            frame_num += 1
+            timestamp = frame_num / fps
+
+            if prefilter_threshold is not None:
+                with stage("prefilter"):
+                    score = crack_score(current_params().crop(frame))
+                if score < prefilter_threshold:
+                    record_prefilter_skip()
+                    continue
+
+            yolo_results = detect_cracks(frame)
+            record_frame(len(yolo_results[0].boxes))
+            current_crack_boxes = [
+                        box.xyxy[0].tolist()  # or box.xywh[0].tolist() if you're using xywh
+                        for box in yolo_results[0].boxes
+                    ]
+
+            if current_crack_boxes and are_different_cracks(prev_crack_boxes, current_crack_boxes):
+                with stage("classify"):
+                    pil_img = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+                    img_array = preprocess_image_from_pil(pil_img)
+                    pred = classify_orientation(img_array)
+                label = orientation_labels.get(np.argmax(pred), "Unknown")
+                full_img_b64, separate_bboxes_b64 = draw_yolo_boxes_separately(frame, yolo_results)
+
+                report_data.append({
+                    "Frame #": frame_num,
+                    "Timestamp (s)": round(timestamp, 2),
+                    "Crack Status": "Cracked",
+                    "Classification": label,
+                    "Full Annotated Image": f'<a href="{full_img_b64}" target="_blank"><img src="{full_img_b64}" width="100"/></a>',
+                    "Separate Bounding Boxes": [
+                        f'<a href="{b}" target="_blank"><img src="{b}" width="100"/></a>'
+                        for b in separate_bboxes_b64
+                    ]
+                })
+                if keep_history:
+                    rows.append(history_row(
+                        "video", True, label, float(np.max(pred)), extract_detections(yolo_results),
+                        frame=frame_num, model_version=model_version, **(tags or {})
+                    ))
+
+                prev_crack_boxes = current_crack_boxes
+    finally:
+        cap.release()
+    history.record(rows)
+    return render(report_data)
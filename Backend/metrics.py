@@ -0,0 +1,168 @@
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest, multiprocess
+)
+
+from profiling import record_stage
+
+# Latency buckets from sub-millisecond drawing up to multi-minute video runs
+STAGE_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 180.0, 600.0,
+)
+
+STAGE_SECONDS = Histogram(
+    'crack_stage_seconds',
+    'Time spent in each processing stage (decode, detect, classify, draw, encode, serialize, pdf_build, ...)',
+    ['endpoint', 'stage'],
+    buckets=STAGE_BUCKETS,
+)
+REQUEST_SECONDS = Histogram(
+    'crack_request_seconds', 'End-to-end request latency', ['endpoint'], buckets=STAGE_BUCKETS
+)
+IMAGES_PROCESSED = Counter('crack_images_processed_total', 'Images run through detection', ['endpoint'])
+FRAMES_PROCESSED = Counter('crack_video_frames_processed_total', 'Video frames run through detection', ['endpoint'])
+DETECTIONS = Counter('crack_detections_total', 'Crack bounding boxes returned by the detector', ['endpoint'])
+CACHE_HITS = Counter('crack_cache_hits_total', 'Results reused without running inference again', ['endpoint', 'cache'])
+PREFILTER_SKIPS = Counter(
+    'crack_prefilter_skipped_total', 'Images/frames the pre-filter ruled out before detection', ['endpoint']
+)
+CANCELLED = Counter(
+    'crack_requests_cancelled_total', 'Requests stopped early (client disconnected or deadline)', ['endpoint', 'reason']
+)
+STREAM_FRAMES_DROPPED = Counter(
+    'crack_stream_frames_dropped_total', 'Live stream frames replaced by a newer frame before inference'
+)
+HISTORY_ROWS_DROPPED = Counter(
+    'crack_history_rows_dropped_total', 'Inspection history rows lost because the writer could not keep up'
+)
+MODEL_RELOADS = Counter('crack_model_reloads_total', 'Model hot-reload attempts', ['result'])
+IN_FLIGHT = Gauge(
+    'crack_requests_in_flight', 'Requests currently being handled', ['endpoint'], multiprocess_mode='livesum'
+)
+QUEUE_DEPTH = Gauge(
+    'crack_queue_depth', 'Work items waiting for a worker or slot', ['queue'], multiprocess_mode='livesum'
+)
+
+# Endpoint label of the request being handled; set by MetricsMiddleware
+_current_endpoint = ContextVar('crack_metrics_endpoint', default='other')
+
+# labels() takes a lock and builds a key on every call; cache the children instead
+_stage_children = {}
+
+
+def current_endpoint():
+    return _current_endpoint.get()
+
+
+@contextmanager
+def bind_endpoint(endpoint):
+    """Label metrics recorded inside the block with `endpoint` (for routes MetricsMiddleware does not see)"""
+    token = _current_endpoint.set(endpoint)
+    try:
+        yield
+    finally:
+        _current_endpoint.reset(token)
+
+
+def _stage_child(endpoint, stage_name):
+    key = (endpoint, stage_name)
+    child = _stage_children.get(key)
+    if child is None:
+        child = _stage_children[key] = STAGE_SECONDS.labels(endpoint, stage_name)
+    return child
+
+
+class stage:
+    """Time a block and record it under crack_stage_seconds for the current endpoint"""
+
+    __slots__ = ('stage_name', 'endpoint', 'start')
+
+    def __init__(self, stage_name, endpoint=None):
+        self.stage_name = stage_name
+        self.endpoint = endpoint
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        _stage_child(self.endpoint or _current_endpoint.get(), self.stage_name).observe(elapsed)
+        record_stage(self.stage_name, elapsed)
+        return False
+
+
+def record_detections(count, endpoint=None):
+    """Count one image run through the detector and the boxes it returned"""
+    endpoint = endpoint or _current_endpoint.get()
+    IMAGES_PROCESSED.labels(endpoint).inc()
+    if count:
+        DETECTIONS.labels(endpoint).inc(count)
+
+
+def record_frame(count, endpoint=None):
+    """Count one video frame run through the detector and the boxes it returned"""
+    endpoint = endpoint or _current_endpoint.get()
+    FRAMES_PROCESSED.labels(endpoint).inc()
+    if count:
+        DETECTIONS.labels(endpoint).inc(count)
+
+
+def record_cache_hit(cache, endpoint=None):
+    """Count one result reused from `cache` instead of running inference"""
+    CACHE_HITS.labels(endpoint or _current_endpoint.get(), cache).inc()
+
+
+def record_prefilter_skip(endpoint=None):
+    """Count one image/frame that skipped detection because the pre-filter ruled it out"""
+    PREFILTER_SKIPS.labels(endpoint or _current_endpoint.get()).inc()
+
+
+def record_cancelled(reason, endpoint=None):
+    """Count one request whose processing was stopped early"""
+    CANCELLED.labels(endpoint or _current_endpoint.get(), reason).inc()
+
+
+class MetricsMiddleware:
+    """ASGI middleware that tracks in-flight requests and end-to-end latency per endpoint.
+
+    Only paths listed in `endpoints` ({path: label}) are tracked, which keeps label
+    cardinality bounded.
+    """
+
+    def __init__(self, app, endpoints):
+        self.app = app
+        self.endpoints = endpoints
+
+    async def __call__(self, scope, receive, send):
+        endpoint = self.endpoints.get(scope.get('path')) if scope['type'] == 'http' else None
+        if endpoint is None:
+            await self.app(scope, receive, send)
+            return
+
+        token = _current_endpoint.set(endpoint)
+        in_flight = IN_FLIGHT.labels(endpoint)
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            REQUEST_SECONDS.labels(endpoint).observe(time.perf_counter() - start)
+            in_flight.dec()
+            _current_endpoint.reset(token)
+
+
+def render_metrics():
+    """Return (body, content_type) for the /metrics endpoint"""
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        # Several uvicorn/gunicorn workers: aggregate the per-process metric files
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -1,17 +1,133 @@
-from tensorflow.keras.models import load_model
-import torch
-from torch import nn
-from ultralytics import YOLO
+import hashlib
+import os
+import threading
+
+import numpy as np
+
+from thread_budget import configure_threads
+
+# CRACK_MODEL_STUB=1 swaps in deterministic stub models (benchmarks, load tests, CI)
+USE_MODEL_STUBS = os.getenv("CRACK_MODEL_STUB", "0") == "1"
+
+# Model files; a retrained model can be deployed over these paths and hot-reloaded (see model_registry.py)
+DETECTOR_MODEL_PATH = os.getenv("DETECTOR_MODEL_PATH", "best.pt")
+CLASSIFIER_MODEL_PATH = os.getenv("CLASSIFIER_MODEL_PATH", "categorization.h5")
+
+# Batch sizes the orientation classifier is compiled for; larger batches are split
+CLASSIFIER_BATCH_BUCKETS = (1, 4, 16, 64)
+
+
+class OrientationClassifier:
+    """Orientation model called through compiled tf.functions instead of Keras predict().
+
+    predict() builds a data adapter, callbacks and a progress bar on every call, which
+    costs more than the network on a single 227x227 input. Here each batch is copied into
+    a reused buffer padded to the next bucket size and run through a concrete function
+    traced once per bucket. Same predict(batch) -> (n, classes) array API as the Keras model.
+    """
+
+    def __init__(self, model, input_shape=(227, 227, 1), buckets=CLASSIFIER_BATCH_BUCKETS):
+        import tensorflow as tf
+
+        self.model = model
+        self.input_shape = tuple(input_shape)
+        self.buckets = tuple(sorted(buckets))
+        self._buffers = {}
+        self._functions = {}
+        # Buffers are shared between calls, so one inference at a time
+        self._lock = threading.Lock()
+        self._infer = tf.function(lambda batch: model(batch, training=False))
+        self._spec = lambda size: tf.TensorSpec((size,) + self.input_shape, tf.float32)
+
+        # Trace the single-image graph up front so the first request does not pay for it
+        self.predict(np.zeros((1,) + self.input_shape, np.float32))
+
+    def _bucket(self, count):
+        for size in self.buckets:
+            if count <= size:
+                return size
+        return self.buckets[-1]
+
+    def _run(self, batch):
+        count = len(batch)
+        size = self._bucket(count)
+        function = self._functions.get(size)
+        if function is None:
+            function = self._functions[size] = self._infer.get_concrete_function(self._spec(size))
+            self._buffers[size] = np.zeros((size,) + self.input_shape, np.float32)
+        buffer = self._buffers[size]
+        buffer[:count] = batch
+        return np.asarray(function(buffer))[:count]
+
+    def predict(self, img_array, **kwargs):
+        """Class probabilities for a (n, 227, 227, 1) batch; extra Keras kwargs are ignored"""
+        batch = np.asarray(img_array, dtype=np.float32).reshape((-1,) + self.input_shape)
+        largest = self.buckets[-1]
+        with self._lock:
+            if len(batch) <= largest:
+                return self._run(batch)
+            return np.concatenate([self._run(batch[i:i + largest]) for i in range(0, len(batch), largest)])
+
+    def warm_up(self):
+        """Trace every batch bucket so no request pays for graph tracing"""
+        for size in self.buckets:
+            self.predict(np.zeros((size,) + self.input_shape, np.float32))
+
+
+def model_version(path):
+    """Short content hash of a model file, reported as its version"""
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha.update(chunk)
+    return sha.hexdigest()[:12]
+
+
+# Thread pools can only be sized once per process, before the first op; reloads reuse the plan
+_thread_plan = None
+
+
+def _configure_threads_once():
+    global _thread_plan
+    if _thread_plan is None:
+        _thread_plan = configure_threads()
+    return _thread_plan
+
+
 class ModelLoader:
-    def __init__(self):
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        
-        
+    def __init__(self, use_stubs=None, detector_path=None, classifier_path=None):
+        self.use_stubs = USE_MODEL_STUBS if use_stubs is None else use_stubs
+        self.detector_path = detector_path or DETECTOR_MODEL_PATH
+        self.classifier_path = classifier_path or CLASSIFIER_MODEL_PATH
+
+
     def get_models(self):
+        if self.use_stubs:
+            from model_stubs import StubDetector, StubClassifier
+            self.thread_plan = _configure_threads_once()
+            self.model1 = StubDetector()
+            self.model2 = StubClassifier()
+            self.versions = {"detector": "stub", "classifier": "stub"}
+            return self.model1, self.model2
+
+        # Imported here so stub mode does not need torch, ultralytics or TensorFlow weights
+        import torch
+        from tensorflow.keras.models import load_model
+        from ultralytics import YOLO
+
+        # Size torch/TF/OpenCV pools before either framework runs an op
+        self.thread_plan = _configure_threads_once()
+
+        # Hashed before loading, so the version describes the exact bytes that were loaded
+        self.versions = {
+            "detector": model_version(self.detector_path),
+            "classifier": model_version(self.classifier_path),
+        }
         device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        self.model1 = YOLO("best.pt").to(device)
+        self.device = device
+        self.model1 = YOLO(self.detector_path).to(device)
         self.model1.eval()  # Set to evaluation mode
-        
-        
-        self.model2 = load_model("categorization.h5")
-        return self.model1, self.model2
\ No newline at end of file
+
+
+        self.model2 = OrientationClassifier(load_model(self.classifier_path))
+        return self.model1, self.model2
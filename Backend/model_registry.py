@@ -0,0 +1,178 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+
+import numpy as np
+
+from metrics import MODEL_RELOADS
+from model_loader import ModelLoader
+
+# Poll the model files this often and hot-reload when they change (0 disables)
+MODEL_WATCH_INTERVAL = float(os.getenv("MODEL_WATCH_INTERVAL", "0"))
+# Synthetic detector calls run on a freshly loaded model before it takes traffic
+MODEL_WARMUP_ROUNDS = int(os.getenv("MODEL_WARMUP_ROUNDS", "3"))
+
+# Model set a request started with; handlers pin it so a swap never changes models mid-request
+_pinned = ContextVar('crack_models', default=None)
+
+
+class ModelSet:
+    """Detector and classifier loaded together, with their versions"""
+
+    def __init__(self, detector, classifier, versions):
+        self.detector = detector
+        self.classifier = classifier
+        self.detector_version = versions["detector"]
+        self.classifier_version = versions["classifier"]
+        self.version = f"{self.detector_version}/{self.classifier_version}"
+        self.loaded_at = datetime.now().isoformat()
+        # The YOLO predictor keeps per-call state and is not thread-safe; the orientation
+        # classifier (model_loader.OrientationClassifier) does its own locking
+        self.detector_lock = threading.Lock()
+
+
+def warm_up(models, rounds=MODEL_WARMUP_ROUNDS):
+    """Run synthetic inference so the first real requests are not slow"""
+    rng = np.random.default_rng(0)
+    for _ in range(rounds):
+        frame = rng.integers(0, 256, (720, 1280, 3), dtype=np.uint8)
+        with models.detector_lock:
+            models.detector(frame, verbose=False)
+    if hasattr(models.classifier, "warm_up"):
+        models.classifier.warm_up()
+    else:
+        models.classifier.predict(np.zeros((1, 227, 227, 1), np.float32), verbose=0)
+
+
+class ModelRegistry:
+    """Holds the serving ModelSet and replaces it without interrupting requests.
+
+    A reload loads and warms the new models in the background while the current ones keep
+    serving, then swaps a single reference. Requests that pinned the old set finish on it;
+    it is freed once the last of them is done. Memory briefly holds both sets.
+    """
+
+    def __init__(self):
+        self.current = self._load()
+        self.last_reload = None
+        self.last_error = None
+        self._reload_lock = threading.Lock()
+        self._watch_interval = None
+        print(f"Models loaded: {self.current.version}")
+
+    def _load(self):
+        loader = ModelLoader()
+        detector, classifier = loader.get_models()
+        models = ModelSet(detector, classifier, loader.versions)
+        warm_up(models)
+        return models
+
+    def active(self):
+        """The pinned model set inside a request, otherwise the current one"""
+        return _pinned.get() or self.current
+
+    @contextmanager
+    def pinned(self):
+        """Serve everything inside the block (including threadpool work) from one model set"""
+        models = self.current
+        token = _pinned.set(models)
+        try:
+            yield models
+        finally:
+            _pinned.reset(token)
+
+    @property
+    def reloading(self):
+        return self._reload_lock.locked()
+
+    def _reload(self):
+        """Swap in freshly loaded models; (ok, error) with error None on success"""
+        start = time.perf_counter()
+        previous = self.current
+        try:
+            models = self._load()
+        except Exception as e:
+            self.last_error = f"{type(e).__name__}: {e}"
+            MODEL_RELOADS.labels('failed').inc()
+            print(f"Model reload failed, still serving {previous.version}: {self.last_error}")
+            return False, self.last_error
+        self.current = models
+        self.last_error = None
+        self.last_reload = models.loaded_at
+        MODEL_RELOADS.labels('ok').inc()
+        print(f"Models reloaded in {time.perf_counter() - start:.1f}s: {previous.version} -> {models.version}")
+        return True, None
+
+    def reload(self, wait=False):
+        """Load, warm and swap in the model files; returns (started, error).
+
+        started is False if a reload is already running. With wait=True error is this
+        reload's failure (None on success); with wait=False the work happens in a background
+        thread, this returns at once and error is always None.
+        """
+        if not self._reload_lock.acquire(blocking=False):
+            return False, None
+
+        def run():
+            try:
+                return self._reload()
+            finally:
+                self._reload_lock.release()
+
+        if wait:
+            _, error = run()
+            return True, error
+        threading.Thread(target=run, name="model-reload", daemon=True).start()
+        return True, None
+
+    def status(self):
+        return {
+            "version": self.current.version,
+            "detector_version": self.current.detector_version,
+            "classifier_version": self.current.classifier_version,
+            "loaded_at": self.current.loaded_at,
+            "last_reload": self.last_reload,
+            "reloading": self.reloading,
+            "last_error": self.last_error,
+            "watch_interval": self._watch_interval,
+        }
+
+    def watch(self, interval=MODEL_WATCH_INTERVAL, paths=None):
+        """Reload when a model file changes; waits until it stops changing so half-copied files are skipped"""
+        loader = ModelLoader()
+        paths = paths or [loader.detector_path, loader.classifier_path]
+
+        def signature():
+            sig = []
+            for path in paths:
+                try:
+                    st = os.stat(path)
+                    sig.append((st.st_size, st.st_mtime_ns))
+                except OSError:
+                    sig.append(None)
+            return sig
+
+        def poll():
+            loaded = signature()
+            last = loaded
+            while True:
+                time.sleep(interval)
+                now = signature()
+                if now != loaded and now == last and None not in now:
+                    # Busy (a manual reload is running) or failed: keep loaded as it was,
+                    # so the change is tried again on the next poll
+                    if self._reload_lock.acquire(blocking=False):
+                        print("Model files changed, reloading")
+                        try:
+                            ok, _ = self._reload()
+                            if ok:
+                                loaded = now
+                        finally:
+                            self._reload_lock.release()
+                last = now
+
+        self._watch_interval = interval
+        threading.Thread(target=poll, name="model-watch", daemon=True).start()
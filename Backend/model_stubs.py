@@ -0,0 +1,114 @@
+import os
+import time
+import numpy as np
+
+# Optional artificial latency so load tests see realistic service times
+STUB_DETECT_LATENCY_MS = float(os.getenv("CRACK_STUB_DETECT_MS", "0"))
+STUB_CLASSIFY_LATENCY_MS = float(os.getenv("CRACK_STUB_CLASSIFY_MS", "0"))
+
+
+class _StubTensor(np.ndarray):
+    """ndarray that answers the torch-style .cpu()/.numpy() calls used on YOLO boxes"""
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return np.asarray(self)
+
+    def new_tensor(self, data):
+        return np.asarray(data, dtype=self.dtype).view(_StubTensor)
+
+
+class StubBoxes:
+    """Mimics ultralytics Boxes: len(), iteration, .data, .xyxy, .conf, .cls"""
+
+    def __init__(self, data, orig_shape=None):
+        self._data = np.asarray(data, dtype=np.float32).reshape(-1, 6)
+        self.orig_shape = orig_shape
+
+    def __len__(self):
+        return len(self._data)
+
+    def __iter__(self):
+        for row in self._data:
+            yield StubBoxes(row[None, :], self.orig_shape)
+
+    def __getitem__(self, index):
+        return StubBoxes(self._data[index], self.orig_shape)
+
+    @property
+    def data(self):
+        return self._data.view(_StubTensor)
+
+    @property
+    def xyxy(self):
+        return self._data[:, :4].view(_StubTensor)
+
+    @property
+    def conf(self):
+        return self._data[:, 4].view(_StubTensor)
+
+    @property
+    def cls(self):
+        return self._data[:, 5].view(_StubTensor)
+
+
+class StubResult:
+    def __init__(self, boxes, orig_shape):
+        self.boxes = boxes
+        self.orig_shape = orig_shape
+
+
+class StubDetector:
+    """Deterministic stand-in for the YOLO crack detector.
+
+    Boxes are derived from a coarse sample of the frame, so identical frames give
+    identical detections and changing content gives changing detections.
+    """
+
+    names = {0: "crack"}
+
+    def __init__(self, crack_rate=0.7, max_boxes=4):
+        self.crack_rate = crack_rate
+        self.max_boxes = max_boxes
+
+    def __call__(self, frame, conf=0.0, iou=0.7, max_det=300, verbose=True, **kwargs):
+        if STUB_DETECT_LATENCY_MS:
+            time.sleep(STUB_DETECT_LATENCY_MS / 1000.0)
+
+        h, w = frame.shape[:2]
+        seed = int(frame[::32, ::32].sum()) % (2 ** 32)
+        rng = np.random.RandomState(seed)
+
+        rows = []
+        if rng.rand() < self.crack_rate:
+            for _ in range(rng.randint(1, self.max_boxes + 1)):
+                x1, y1 = rng.randint(0, max(w - 32, 1)), rng.randint(0, max(h - 32, 1))
+                x2 = min(w, x1 + rng.randint(16, max(w // 3, 17)))
+                y2 = min(h, y1 + rng.randint(16, max(h // 3, 17)))
+                rows.append([x1, y1, x2, y2, rng.uniform(0.25, 0.95), 0])
+
+        data = np.asarray(rows, dtype=np.float32).reshape(-1, 6)
+        data = data[data[:, 4] >= conf][:max_det]
+        return [StubResult(StubBoxes(data, (h, w)), (h, w))]
+
+    def to(self, device):
+        return self
+
+    def eval(self):
+        return self
+
+
+class StubClassifier:
+    """Stand-in for the Keras orientation classifier (227x227x1 input, 3 classes)"""
+
+    def predict(self, img_array, verbose="auto", **kwargs):
+        if STUB_CLASSIFY_LATENCY_MS:
+            time.sleep(STUB_CLASSIFY_LATENCY_MS / 1000.0)
+
+        batch = np.asarray(img_array, dtype=np.float32)
+        means = batch.reshape(len(batch), -1).mean(axis=1)
+        logits = np.stack([means % 7, means % 5, means % 3], axis=1)
+        exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+        return (exp / exp.sum(axis=1, keepdims=True)).astype(np.float32)
@@ -0,0 +1,37 @@
+import os
+
+import cv2
+import numpy as np
+
+# Cheap crack/no-crack check run ahead of YOLO. Cracks show up as thin dark lines, which a
+# morphological black-hat on a downscaled grayscale frame isolates; the score is the fraction
+# of pixels with a strong black-hat response. Frames scoring below the threshold skip YOLO.
+PREFILTER_WIDTH = 320
+PREFILTER_KERNEL = cv2.getStructuringElement(cv2.MORPH_RECT, (5, 5))
+PREFILTER_LEVEL = 30
+
+# Calibrate for your footage with `python -m benchmarks.calibrate_prefilter`
+DEFAULT_PREFILTER_THRESHOLD = float(os.getenv('PREFILTER_THRESHOLD', '0.002'))
+
+
+def _downscale(image):
+    h, w = image.shape[:2]
+    if w <= PREFILTER_WIDTH:
+        return image
+    return cv2.resize(image, (PREFILTER_WIDTH, max(1, int(h * PREFILTER_WIDTH / w))), interpolation=cv2.INTER_AREA)
+
+
+def crack_score(image):
+    """Fraction of thin-dark-line pixels in a BGR or grayscale image"""
+    small = _downscale(image)
+    gray = small if small.ndim == 2 else cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    blackhat = cv2.morphologyEx(gray, cv2.MORPH_BLACKHAT, PREFILTER_KERNEL)
+    return np.count_nonzero(blackhat > PREFILTER_LEVEL) / blackhat.size
+
+
+def crack_score_file(path):
+    """crack_score of an image file decoded at reduced size, or None if it cannot be decoded"""
+    gray = cv2.imread(path, cv2.IMREAD_REDUCED_GRAYSCALE_2)
+    if gray is None:
+        return None
+    return crack_score(gray)
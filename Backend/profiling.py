@@ -0,0 +1,208 @@
+import cProfile
+import functools
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from contextvars import ContextVar
+from datetime import datetime
+from urllib.parse import parse_qs
+
+# Opt-in per-request profiling. Send "X-Profile: 1" (or ?profile=1) to get a Server-Timing
+# breakdown and peak allocation back; "X-Profile: cprofile" plus a matching X-Admin-Token also
+# saves a pstats dump to PROFILE_DIR.
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+PROFILE_HEADERS = ["Server-Timing", "X-Peak-Alloc-Bytes", "X-Profile-Dump"]
+
+_active_profile = ContextVar("crack_request_profile", default=None)
+
+# tracemalloc is process-wide: keep it running while any profiled request is in flight
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+
+# Only one cProfile profiler can be active at a time
+_cprofile_lock = threading.Lock()
+
+# Worker-thread profilers of the request being cProfiled; merged into its dump
+_thread_profilers = ContextVar("crack_thread_profilers", default=None)
+
+
+class RequestProfile:
+    """Stage timings collected for one request"""
+
+    def __init__(self):
+        self.stages = {}
+        self.order = []
+
+    def add(self, stage_name, seconds):
+        entry = self.stages.get(stage_name)
+        if entry is None:
+            entry = self.stages[stage_name] = [0.0, 0]
+            self.order.append(stage_name)
+        entry[0] += seconds
+        entry[1] += 1
+
+    def server_timing(self, total_seconds):
+        """Format as a Server-Timing header value (durations in ms)"""
+        parts = [
+            f'{name};dur={self.stages[name][0] * 1000:.2f};desc="{self.stages[name][1]} calls"'
+            for name in self.order
+        ]
+        parts.append(f"total;dur={total_seconds * 1000:.2f}")
+        return ", ".join(parts)
+
+
+def record_stage(stage_name, seconds):
+    """Add a stage timing to the current request's profile, if it is being profiled"""
+    profile = _active_profile.get()
+    if profile is not None:
+        profile.add(stage_name, seconds)
+
+
+def _start_tracemalloc():
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _tracemalloc_users += 1
+        tracemalloc.reset_peak()
+
+
+def _stop_tracemalloc():
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0:
+            tracemalloc.stop()
+
+
+def profiled(func):
+    """Wrap a threadpool callable so a cProfiled request also profiles the worker thread.
+
+    Before Python 3.12 cProfile only sees the thread that enabled it, and the request's
+    decode/detect/draw/encode work runs in the threadpool, not on the event loop.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        profilers = _thread_profilers.get()
+        # 3.12+ profiles through sys.monitoring, which already covers every thread
+        if profilers is None or sys.version_info >= (3, 12):
+            return func(*args, **kwargs)
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler.disable()
+            profilers.append(profiler)
+    return wrapper
+
+
+def _requested_mode(scope):
+    """Return None, 'timing' or 'cprofile' from the X-Profile header or ?profile= query"""
+    value = None
+    for name, header_value in scope.get("headers", []):
+        if name == b"x-profile":
+            value = header_value.decode("latin-1").strip().lower()
+            break
+    if value is None and scope.get("query_string"):
+        values = parse_qs(scope["query_string"].decode("latin-1")).get("profile")
+        value = values[0].strip().lower() if values else None
+    if value in (None, "", "0", "false", "no"):
+        return None
+    return "cprofile" if value == "cprofile" else "timing"
+
+
+def is_admin(scope):
+    if not ADMIN_TOKEN:
+        return False
+    for name, header_value in scope.get("headers", []):
+        if name == b"x-admin-token":
+            return header_value.decode("latin-1") == ADMIN_TOKEN
+    return False
+
+
+def _dump_name(path):
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    return f"{timestamp}_{path.strip('/').replace('/', '_')}_{uuid.uuid4().hex[:8]}.pstats"
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles opted-in requests to the given paths.
+
+    Timings come from the metrics.stage() blocks the request passes through. Peak
+    allocation uses tracemalloc and is process-wide, so it is approximate when other
+    requests run at the same time.
+    """
+
+    def __init__(self, app, paths):
+        self.app = app
+        self.paths = set(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("path") not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        mode = _requested_mode(scope)
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile()
+        token = _active_profile.set(profile)
+        thread_token = None
+        profiler = None
+        dump_status = None
+        if mode == "cprofile":
+            if not is_admin(scope):
+                dump_status = "forbidden"
+            elif not _cprofile_lock.acquire(blocking=False):
+                dump_status = "busy"
+            else:
+                profiler = cProfile.Profile()
+                thread_token = _thread_profilers.set([])
+                # Named up front so the filename can go out with the response headers
+                dump_status = _dump_name(scope["path"])
+
+        _start_tracemalloc()
+        start = time.perf_counter()
+
+        async def send_with_profile(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", profile.server_timing(time.perf_counter() - start).encode()))
+                headers.append((b"x-peak-alloc-bytes", str(tracemalloc.get_traced_memory()[1]).encode()))
+                if dump_status:
+                    headers.append((b"x-profile-dump", dump_status.encode()))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            if profiler is not None:
+                profiler.enable()
+                try:
+                    await self.app(scope, receive, send_with_profile)
+                finally:
+                    profiler.disable()
+                    _cprofile_lock.release()
+                    self._dump([profiler] + _thread_profilers.get(), dump_status)
+            else:
+                await self.app(scope, receive, send_with_profile)
+        finally:
+            _stop_tracemalloc()
+            if thread_token is not None:
+                _thread_profilers.reset(thread_token)
+            _active_profile.reset(token)
+
+    def _dump(self, profilers, name):
+        """Event-loop and worker-thread profiles merged into one pstats file"""
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        dump_path = os.path.join(PROFILE_DIR, name)
+        pstats.Stats(*profilers).dump_stats(dump_path)
+        print(f"Saved request profile to {dump_path}")
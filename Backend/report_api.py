@@ -0,0 +1,156 @@
+"""Report role: PDF report endpoints.
+
+Only needs ReportService and reportlab, so report replicas start without importing
+torch or TensorFlow.
+"""
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+from report_service import ReportService, REPORT_LAYOUTS
+from datetime import datetime
+import io
+
+router = APIRouter()
+
+# Endpoint class per path for admission control (see admission.py)
+ADMISSION_ROUTES = {
+    "/generate-report": "report",
+    "/generate-batch-report": "report",
+    "/generate-video-report": "report",
+}
+
+# Metric endpoint label per path (see metrics.MetricsMiddleware)
+METRIC_ENDPOINTS = {
+    "/generate-report": "report",
+    "/generate-batch-report": "batch_report",
+    "/generate-video-report": "video_report",
+}
+
+# Report endpoints are not part of per-request profiling
+PROFILE_PATHS = []
+
+# Extra response headers browsers may read (CORS expose_headers)
+RESPONSE_HEADERS = []
+
+# Initialize report service
+report_service = ReportService()
+
+
+# Pydantic models for request bodies
+class ReportRequest(BaseModel):
+    crack_type: str
+    confidence: float = 0.0
+    image_base64: str = None
+
+
+@router.post("/generate-report")
+async def generate_report(request: ReportRequest):
+    """Generate PDF report for crack detection results"""
+    try:
+        print(f"Received request: crack_type={request.crack_type}, confidence={request.confidence}")
+        print(f"Image base64 length: {len(request.image_base64) if request.image_base64 else 'None'}")
+        
+        detection_result = {
+            'crack_type': request.crack_type,
+            'confidence': request.confidence
+        }
+        
+        # Generate PDF report
+        print("Calling report_service.generate_report...")
+        pdf_buffer = await run_in_threadpool(report_service.generate_report, detection_result, request.image_base64)
+        print(f"PDF generated successfully, size: {len(pdf_buffer.getvalue())} bytes")
+        
+        # Create filename with timestamp
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        filename = f"crack_analysis_report_{request.crack_type.replace(' ', '_')}_{timestamp}.pdf"
+        
+        # Return PDF as streaming response
+        return StreamingResponse(
+            io.BytesIO(pdf_buffer.getvalue()),
+            media_type="application/pdf",
+            headers={"Content-Disposition": f"attachment; filename={filename}"}
+        )
+    
+    except Exception as e:
+        print(f"ERROR in generate_report: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Error generating report: {str(e)}")
+
+
+@router.post("/report-preview")
+async def report_preview(crack_type: str = Query(..., description="Type of crack detected")):
+    """Get preview information for the crack type"""
+    try:
+        preview_data = report_service.get_crack_preview(crack_type)
+        return JSONResponse(content=preview_data)
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting preview: {str(e)}")
+
+
+@router.post("/generate-batch-report")
+async def generate_batch_report(request: dict):
+    """Generate PDF report for batch (ZIP) processing results"""
+    layout = request.get('layout', 'compact')
+    if layout not in REPORT_LAYOUTS:
+        raise HTTPException(status_code=400, detail=f"layout must be one of {', '.join(REPORT_LAYOUTS)}")
+
+    try:
+        print(f"Received batch report request with {len(request.get('results', []))} results")
+        
+        # Generate PDF report for batch processing
+        pdf_buffer = await run_in_threadpool(
+            report_service.generate_batch_report, request.get('results', []), layout=layout
+        )
+        
+        # Create filename with timestamp
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        filename = f"crack_batch_analysis_report_{timestamp}.pdf"
+        
+        # Return PDF as streaming response
+        return StreamingResponse(
+            io.BytesIO(pdf_buffer.getvalue()),
+            media_type="application/pdf",
+            headers={"Content-Disposition": f"attachment; filename={filename}"}
+        )
+    
+    except Exception as e:
+        print(f"ERROR in generate_batch_report: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Error generating batch report: {str(e)}")
+
+
+@router.post("/generate-video-report")
+async def generate_video_report(request: dict):
+    """Generate PDF report for video processing results"""
+    layout = request.get('layout', 'compact')
+    if layout not in REPORT_LAYOUTS:
+        raise HTTPException(status_code=400, detail=f"layout must be one of {', '.join(REPORT_LAYOUTS)}")
+
+    try:
+        print(f"Received video report request with {len(request.get('results', []))} results")
+        
+        # Generate PDF report for video processing
+        pdf_buffer = await run_in_threadpool(
+            report_service.generate_video_report, request.get('results', []), layout=layout
+        )
+        
+        # Create filename with timestamp
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        filename = f"crack_video_analysis_report_{timestamp}.pdf"
+        
+        # Return PDF as streaming response
+        return StreamingResponse(
+            io.BytesIO(pdf_buffer.getvalue()),
+            media_type="application/pdf",
+            headers={"Content-Disposition": f"attachment; filename={filename}"}
+        )
+    
+    except Exception as e:
+        print(f"ERROR in generate_video_report: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Error generating video report: {str(e)}")
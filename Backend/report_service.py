@@ -6,10 +6,57 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib import colors
 from reportlab.platypus import PageBreak
+from reportlab.pdfgen import canvas
 import base64
 import tempfile
 import os
+import re
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from PIL import Image as PILImage
+from metrics import stage, QUEUE_DEPTH
+from thread_budget import available_cpus
+
+try:
+    from pypdf import PdfReader, PdfWriter
+except ImportError:  # Parallel rendering needs pypdf to merge parts; fall back to one build
+    PdfReader = PdfWriter = None
+
+REPORT_LAYOUTS = ('compact', 'detailed')
+
+# Thumbnails are embedded at roughly 2x their printed size so the compact grid stays legible
+THUMBNAIL_WIDTH = 1.2 * inch
+THUMBNAIL_HEIGHT = 0.9 * inch
+THUMBNAIL_PIXELS = (240, 180)
+
+_HTML_IMAGE_LINK = re.compile(r'href="(data:image[^"]+)"')
+
+# Large batch/video reports are split into chunks of at least REPORT_CHUNK_SIZE results,
+# rendered in REPORT_WORKERS processes and merged. REPORT_WORKERS=1 disables this.
+REPORT_WORKERS = int(os.getenv('REPORT_WORKERS', available_cpus()))
+REPORT_CHUNK_SIZE = int(os.getenv('REPORT_CHUNK_SIZE', '50'))
+
+# Keys needed to build the summary and appendix; everything else (images) stays with its chunk
+_SUMMARY_KEYS = {
+    'batch': ('cracked', 'orientation'),
+    'video': ('Frame #', 'Timestamp (s)', 'Classification'),
+}
+
+BATCH_RECOMMENDATIONS = ("General Recommendations:", [
+    "Prioritize repairs based on crack severity levels indicated in the detailed analysis.",
+    "Conduct regular monitoring of all detected crack locations.",
+    "Consult with a qualified structural engineer for critical repairs.",
+    "Implement preventive measures to avoid future crack development.",
+])
+
+VIDEO_RECOMMENDATIONS = ("General Video Analysis Recommendations:", [
+    "Focus inspection efforts on the timestamps where cracks were detected.",
+    "Conduct detailed physical inspection at the identified locations.",
+    "Monitor crack progression by comparing with future video analyses.",
+    "Prioritize repair actions based on crack type severity levels indicated above.",
+])
 
 class ReportService:
     def __init__(self):
@@ -90,23 +137,131 @@ class ReportService:
                 'urgency': 'Immediate attention required'
             }
         }
-    
+
+        # Styles and table styles are immutable once built, so share them across reports
+        self._build_styles()
+
+    def _build_styles(self):
+        """Build the paragraph and table styles used by every report"""
+        self.styles = getSampleStyleSheet()
+
+        self.title_style = ParagraphStyle(
+            'CustomTitle',
+            parent=self.styles['Heading1'],
+            fontSize=24,
+            spaceAfter=30,
+            alignment=1,  # Center
+            textColor=colors.darkblue
+        )
+
+        self.subtitle_style = ParagraphStyle(
+            'CustomSubtitle',
+            parent=self.styles['Heading2'],
+            fontSize=16,
+            spaceAfter=15,
+            textColor=colors.darkred
+        )
+
+        self.info_table_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, -1), colors.lightblue),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 12),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ])
+
+        self.risk_table_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, -1), colors.lightyellow),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 11),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ])
+
+        self.summary_table_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 14),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ])
+
+        self.timeline_table_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ])
+
+        self.header_table_style = TableStyle([
+            ('ALIGN', (0, 0), (0, 0), 'LEFT'),
+            ('ALIGN', (1, 0), (1, 0), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('LEFTPADDING', (0, 0), (-1, -1), 0),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 0),
+            ('TOPPADDING', (0, 0), (-1, -1), 3),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 3)
+        ])
+
+        self.details_table_style = TableStyle([
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('LEFTPADDING', (0, 0), (-1, -1), 2),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 2),
+            ('TOPPADDING', (0, 0), (-1, -1), 3),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
+            ('BACKGROUND', (0, 0), (-1, -1), colors.lightgrey)
+        ])
+
+        # Dense per-image/per-frame grid used by the compact layout
+        self.grid_table_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('TOPPADDING', (0, 0), (-1, -1), 2),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.beige]),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+        ])
+
+    def _decode_base64_image(self, base64_string):
+        """Decode a data URI, raw base64 string or video HTML link into image bytes"""
+        # Handle HTML links from video results
+        if '<a href="' in base64_string and 'data:image' in base64_string:
+            # Extract base64 data from HTML link
+            match = _HTML_IMAGE_LINK.search(base64_string)
+            if match:
+                base64_string = match.group(1)
+
+        if base64_string.startswith('data:image'):
+            base64_string = base64_string.split(',')[1]
+
+        return base64.b64decode(base64_string)
+
     def _save_base64_image(self, base64_string):
         """Save base64 image to temporary file and return path"""
         try:
-            # Handle HTML links from video results
-            if '<a href="' in base64_string and 'data:image' in base64_string:
-                # Extract base64 data from HTML link
-                import re
-                match = re.search(r'href="(data:image[^"]+)"', base64_string)
-                if match:
-                    base64_string = match.group(1)
-            
-            if base64_string.startswith('data:image'):
-                base64_string = base64_string.split(',')[1]
-            
-            image_data = base64.b64decode(base64_string)
-            
+            image_data = self._decode_base64_image(base64_string)
+
             # Create temp file with proper handling
             temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.png', mode='wb')
             temp_file.write(image_data)
@@ -127,27 +282,11 @@ class ReportService:
         try:
             buffer = io.BytesIO()
             doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=0.5*inch)
-            styles = getSampleStyleSheet()
+            styles = self.styles
+            title_style = self.title_style
+            subtitle_style = self.subtitle_style
             story = []
             
-            # Custom styles
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=24,
-                spaceAfter=30,
-                alignment=1,  # Center
-                textColor=colors.darkblue
-            )
-            
-            subtitle_style = ParagraphStyle(
-                'CustomSubtitle',
-                parent=styles['Heading2'],
-                fontSize=16,
-                spaceAfter=15,
-                textColor=colors.darkred
-            )
-            
             # Title
             story.append(Paragraph("Crack Detection Analysis Report", title_style))
             story.append(Spacer(1, 20))
@@ -162,15 +301,7 @@ class ReportService:
             ]
             
             info_table = Table(report_info, colWidths=[2.5*inch, 3*inch])
-            info_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, -1), colors.lightblue),
-                ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ]))
+            info_table.setStyle(self.info_table_style)
             story.append(info_table)
             story.append(Spacer(1, 20))
             
@@ -219,15 +350,7 @@ class ReportService:
             ]
             
             risk_table = Table(risk_info, colWidths=[2.5*inch, 3*inch])
-            risk_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, -1), colors.lightyellow),
-                ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 0), (-1, -1), 11),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ]))
+            risk_table.setStyle(self.risk_table_style)
             story.append(risk_table)
             story.append(Spacer(1, 20))
             
@@ -260,7 +383,8 @@ class ReportService:
             ))
             
             # Build PDF
-            doc.build(story)
+            with stage('pdf_build'):
+                doc.build(story)
             buffer.seek(0)
             
             # Clean up temporary image file after PDF is built
@@ -303,232 +427,351 @@ class ReportService:
             'prevention': crack_info['prevention']
         }
     
-    def generate_batch_report(self, batch_results):
+    def generate_batch_report(self, batch_results, layout='compact'):
         """Generate PDF report for batch processing results"""
         try:
-            buffer = io.BytesIO()
-            doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=0.5*inch)
-            styles = getSampleStyleSheet()
-            story = []
-            
-            # Custom styles
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=24,
-                spaceAfter=30,
-                alignment=1,
-                textColor=colors.darkblue
-            )
-            
-            subtitle_style = ParagraphStyle(
-                'CustomSubtitle',
-                parent=styles['Heading2'],
-                fontSize=16,
-                spaceAfter=15,
-                textColor=colors.darkred
-            )
-            
-            # Title
-            story.append(Paragraph("Batch Crack Detection Analysis Report", title_style))
-            story.append(Spacer(1, 20))
-            
-            # Report metadata
-            current_time = datetime.now()
-            total_images = len(batch_results)
-            cracked_images = len([r for r in batch_results if r.get('cracked', False)])
-            
-            report_info = [
-                ['Report Generated:', current_time.strftime('%Y-%m-%d %H:%M:%S')],
-                ['Total Images Processed:', str(total_images)],
-                ['Images with Cracks:', str(cracked_images)],
-                ['Images without Cracks:', str(total_images - cracked_images)],
-                ['Analysis Type:', 'Batch Processing']
-            ]
-            
-            info_table = Table(report_info, colWidths=[2.5*inch, 3*inch])
-            info_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, -1), colors.lightblue),
-                ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ]))
-            story.append(info_table)
-            story.append(Spacer(1, 20))
-            
-            # Summary by crack type
-            crack_summary = {}
-            for result in batch_results:
-                if result.get('cracked', False) and result.get('orientation'):
-                    crack_type = result['orientation']
-                    crack_summary[crack_type] = crack_summary.get(crack_type, 0) + 1
-            
-            if crack_summary:
-                story.append(Paragraph("Crack Type Summary:", subtitle_style))
-                summary_data = [['Crack Type', 'Count']]
-                for crack_type, count in crack_summary.items():
-                    summary_data.append([crack_type, str(count)])
-                
-                summary_table = Table(summary_data, colWidths=[3*inch, 1*inch])
-                summary_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, 0), 14),
-                    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ]))
-                story.append(summary_table)
-                story.append(Spacer(1, 30))
-            
-            # Detailed results
-            story.append(Paragraph("Detailed Analysis Results:", subtitle_style))
-            story.append(Spacer(1, 12))
-            
-            # Store temporary files for cleanup after PDF generation
-            temp_files_to_cleanup = []
-            
-            for i, result in enumerate(batch_results, 1):
-                if result.get('cracked', False):
-                    crack_type = result.get('orientation', 'Unknown')
-                    
-                    # Fix the duplicate "crack" word issue
-                    if 'crack' in crack_type.lower():
-                        heading_text = f"Image {i}: {crack_type.title()} Detected"
-                    else:
-                        heading_text = f"Image {i}: {crack_type.title()} Crack Detected"
-                    
-                    # Get crack-specific information
-                    crack_key = self._get_crack_key(crack_type)
-                    crack_info = self.crack_solutions.get(crack_key, self.crack_solutions['unprecidented crack'])
-                    
-                    # Handle annotated image first
-                    img_flowable = None
-                    if result.get('annotated_image'):
-                        try:
-                            temp_image_path = self._save_base64_image(result['annotated_image'])
-                            if temp_image_path:
-                                temp_files_to_cleanup.append(temp_image_path)
-                            
-                            if temp_image_path and os.path.exists(temp_image_path):
-                                img_flowable = Image(temp_image_path, width=2.5*inch, height=1.8*inch)
-                                
-                        except Exception as e:
-                            print(f"Error processing annotated image for result {i}: {str(e)}")
-                    
-                    # Create header with image on the right
-                    if img_flowable:
-                        header_data = [[
-                            Paragraph(heading_text, styles['Heading3']),
-                            img_flowable
-                        ]]
-                        
-                        header_table = Table(header_data, colWidths=[3.5*inch, 2.5*inch])
-                        header_table.setStyle(TableStyle([
-                            ('ALIGN', (0, 0), (0, 0), 'LEFT'),
-                            ('ALIGN', (1, 0), (1, 0), 'CENTER'),
-                            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                            ('LEFTPADDING', (0, 0), (-1, -1), 0),
-                            ('RIGHTPADDING', (0, 0), (-1, -1), 0),
-                            ('TOPPADDING', (0, 0), (-1, -1), 3),
-                            ('BOTTOMPADDING', (0, 0), (-1, -1), 3)
-                        ]))
-                        
-                        story.append(header_table)
-                    else:
-                        story.append(Paragraph(heading_text, styles['Heading3']))
-                    
-                    story.append(Spacer(1, 8))
-                    
-                    # Create compact details layout
-                    details_data = [
-                        ['Severity:', crack_info['severity'], 'Urgency:', crack_info['urgency']]
-                    ]
-                    
-                    details_table = Table(details_data, colWidths=[1*inch, 1.5*inch, 1*inch, 1.5*inch])
-                    details_table.setStyle(TableStyle([
-                        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-                        ('FONTSIZE', (0, 0), (-1, -1), 9),
-                        ('FONTNAME', (0, 0), (0, 0), 'Helvetica-Bold'),
-                        ('FONTNAME', (2, 0), (2, 0), 'Helvetica-Bold'),
-                        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                        ('LEFTPADDING', (0, 0), (-1, -1), 2),
-                        ('RIGHTPADDING', (0, 0), (-1, -1), 2),
-                        ('TOPPADDING', (0, 0), (-1, -1), 3),
-                        ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
-                        ('BACKGROUND', (0, 0), (-1, -1), colors.lightgrey)
-                    ]))
-                    
-                    story.append(details_table)
-                    story.append(Spacer(1, 8))
-                    
-                    # Add crack details in compact format
-                    story.append(Paragraph("<b>Possible Causes:</b>", styles['Heading4']))
-                    for cause in crack_info['causes']:
-                        story.append(Paragraph(f"• {cause}", styles['Normal']))
-                    story.append(Spacer(1, 6))
-                    
-                    story.append(Paragraph("<b>Recommended Solutions:</b>", styles['Heading4']))
-                    for solution in crack_info['solutions']:
-                        story.append(Paragraph(f"• {solution}", styles['Normal']))
-                    story.append(Spacer(1, 6))
-                    
-                    story.append(Paragraph("<b>Prevention Measures:</b>", styles['Heading4']))
-                    for prevention in crack_info['prevention']:
-                        story.append(Paragraph(f"• {prevention}", styles['Normal']))
-                    
-                    story.append(Spacer(1, 15))  # Reduced spacing between images
-                    
-                else:
-                    story.append(Paragraph(f"Image {i}: No Crack Detected", styles['Heading3']))
-                    story.append(Paragraph("No specific recommendations required for this image.", styles['Normal']))
-                    story.append(Spacer(1, 10))  # Reduced spacing for non-cracked images
-            
-            # General recommendations
-            story.append(Paragraph("General Recommendations:", subtitle_style))
-            story.append(Paragraph(
-                "1. Prioritize repairs based on crack severity levels indicated in the detailed analysis.",
-                styles['Normal']
-            ))
-            story.append(Paragraph(
-                "2. Conduct regular monitoring of all detected crack locations.",
-                styles['Normal']
-            ))
-            story.append(Paragraph(
-                "3. Consult with a qualified structural engineer for critical repairs.",
-                styles['Normal']
-            ))
-            story.append(Paragraph(
-                "4. Implement preventive measures to avoid future crack development.",
-                styles['Normal']
-            ))
-            
-            # Build PDF
-            doc.build(story)
-            
-            # Clean up temporary files after PDF is built
-            for temp_file in temp_files_to_cleanup:
-                if temp_file and os.path.exists(temp_file):
-                    try:
-                        os.remove(temp_file)
-                    except Exception as cleanup_error:
-                        print(f"Warning: Could not clean up temporary file {temp_file}: {cleanup_error}")
-            
-            buffer.seek(0)
-            return buffer
-            
+            return self._render_report('batch', batch_results, layout)
+
         except Exception as e:
             print(f"Error in generate_batch_report: {str(e)}")
             import traceback
             traceback.print_exc()
             raise e
-    
+
+    def _render_report(self, kind, results, layout):
+        """Render a batch or video report, splitting it across worker processes when large"""
+        if layout not in REPORT_LAYOUTS:
+            raise ValueError(f"Unknown report layout: {layout}")
+
+        parts = self._split_report_parts(kind, results, layout)
+        if len(parts) > 1:
+            pending = QUEUE_DEPTH.labels('report_parts')
+            pending.inc(len(parts))
+            remaining = len(parts)
+            try:
+                part_pdfs = []
+                with stage('pdf_build'):
+                    for part_pdf in _get_report_pool().map(_render_part_in_worker, parts):
+                        part_pdfs.append(part_pdf)
+                        pending.dec()
+                        remaining -= 1
+                with stage('pdf_merge'):
+                    return _merge_with_page_numbers(part_pdfs)
+            except BrokenProcessPool as e:
+                print(f"Warning: report worker pool failed ({e}), rendering in-process")
+                _reset_report_pool()
+                parts = self._split_report_parts(kind, results, layout, parallel=False)
+            finally:
+                pending.dec(remaining)
+
+        buffer = io.BytesIO()
+        with stage('pdf_build'):
+            buffer.write(self._render_part_pdf(parts[0], numbered=True))
+        buffer.seek(0)
+        return buffer
+
+    def _split_report_parts(self, kind, results, layout, parallel=True):
+        """Split results into independently renderable parts.
+
+        The first part carries the summary section and the last part the closing
+        recommendations, both computed over all results. Image payloads are only
+        shipped with the chunk that renders them.
+        """
+        summary = [_summary_view(kind, r) for r in results]
+        if kind == 'batch':
+            crack_types = [r.get('orientation') for r in summary if r.get('cracked', False)]
+        else:
+            crack_types = [r.get('Classification') for r in summary]
+
+        chunk_size = len(results) or 1
+        if parallel and REPORT_WORKERS > 1 and PdfWriter is not None and len(results) > REPORT_CHUNK_SIZE:
+            chunk_size = max(REPORT_CHUNK_SIZE, -(-len(results) // REPORT_WORKERS))
+
+        parts = []
+        for start in range(0, max(len(results), 1), chunk_size):
+            parts.append({
+                'kind': kind,
+                'layout': layout,
+                'summary': summary if start == 0 else None,
+                'results': results[start:start + chunk_size],
+                'start_index': start + 1,
+                'crack_types': None,
+            })
+        parts[-1]['crack_types'] = crack_types
+        return parts
+
+    def _render_part_pdf(self, part, numbered=False):
+        """Build one report part and return the PDF bytes"""
+        buffer = io.BytesIO()
+        doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=0.5*inch)
+
+        # Store temporary files for cleanup after PDF generation
+        temp_files_to_cleanup = []
+
+        kind = part['kind']
+        compact = part['layout'] == 'compact'
+        first_part = part['summary'] is not None
+        story = []
+
+        if first_part:
+            if kind == 'batch':
+                story.extend(self._batch_summary_story(part['summary']))
+            else:
+                story.extend(self._video_summary_story(part['summary'], include_timeline=not compact))
+
+        if part['results']:
+            if kind == 'batch' and compact:
+                story.extend(self._batch_grid_story(part['results'], part['start_index'], heading=first_part))
+            elif kind == 'batch':
+                story.extend(self._batch_detailed_story(
+                    part['results'], temp_files_to_cleanup, part['start_index'], heading=first_part
+                ))
+            elif compact:
+                story.extend(self._video_grid_story(part['results'], part['start_index'], heading=first_part))
+            else:
+                story.extend(self._video_detailed_story(
+                    part['results'], temp_files_to_cleanup, part['start_index'], heading=first_part
+                ))
+
+        if part['crack_types'] is not None:
+            story.extend(self._general_recommendations_story(
+                BATCH_RECOMMENDATIONS if kind == 'batch' else VIDEO_RECOMMENDATIONS
+            ))
+            if compact:
+                story.extend(self._recommendations_appendix_story(part['crack_types']))
+
+        # Build PDF
+        if numbered:
+            doc.build(story, canvasmaker=NumberedCanvas)
+        else:
+            doc.build(story)
+
+        # Clean up temporary files after PDF is built
+        self._cleanup_temp_files(temp_files_to_cleanup)
+
+        return buffer.getvalue()
+
+    def _batch_summary_story(self, batch_results):
+        """Title, metadata and crack type summary for a batch report"""
+        story = []
+
+        # Title
+        story.append(Paragraph("Batch Crack Detection Analysis Report", self.title_style))
+        story.append(Spacer(1, 20))
+
+        # Report metadata
+        current_time = datetime.now()
+        total_images = len(batch_results)
+        cracked_images = len([r for r in batch_results if r.get('cracked', False)])
+
+        report_info = [
+            ['Report Generated:', current_time.strftime('%Y-%m-%d %H:%M:%S')],
+            ['Total Images Processed:', str(total_images)],
+            ['Images with Cracks:', str(cracked_images)],
+            ['Images without Cracks:', str(total_images - cracked_images)],
+            ['Analysis Type:', 'Batch Processing']
+        ]
+
+        info_table = Table(report_info, colWidths=[2.5*inch, 3*inch])
+        info_table.setStyle(self.info_table_style)
+        story.append(info_table)
+        story.append(Spacer(1, 20))
+
+        # Summary by crack type
+        crack_summary = {}
+        for result in batch_results:
+            if result.get('cracked', False) and result.get('orientation'):
+                crack_type = result['orientation']
+                crack_summary[crack_type] = crack_summary.get(crack_type, 0) + 1
+
+        if crack_summary:
+            story.append(Paragraph("Crack Type Summary:", self.subtitle_style))
+            summary_data = [['Crack Type', 'Count']]
+            for crack_type, count in crack_summary.items():
+                summary_data.append([crack_type, str(count)])
+
+            summary_table = Table(summary_data, colWidths=[3*inch, 1*inch])
+            summary_table.setStyle(self.summary_table_style)
+            story.append(summary_table)
+            story.append(Spacer(1, 30))
+
+        return story
+
+    def _batch_grid_story(self, batch_results, start_index=1, heading=True):
+        """One grid row per image; recommendations live in the appendix"""
+        story = [Paragraph("Per-Image Results:", self.subtitle_style)] if heading else []
+
+        grid_data = [['#', 'Annotated Image', 'Result', 'Crack Type', 'Severity']]
+        for i, result in enumerate(batch_results, start_index):
+            if result.get('cracked', False):
+                crack_type = result.get('orientation') or 'Unknown'
+                crack_info = self._get_crack_info(crack_type)
+                grid_data.append([
+                    str(i),
+                    self._thumbnail_flowable(result.get('annotated_image')),
+                    'Cracked',
+                    crack_type,
+                    crack_info['severity']
+                ])
+            else:
+                grid_data.append([str(i), '-', 'No Crack', '-', '-'])
+
+        grid_table = Table(
+            grid_data,
+            colWidths=[0.5*inch, 1.4*inch, 1*inch, 2*inch, 1.3*inch],
+            repeatRows=1
+        )
+        grid_table.setStyle(self.grid_table_style)
+        story.append(grid_table)
+        story.append(Spacer(1, 20))
+        return story
+
+    def _batch_detailed_story(self, batch_results, temp_files_to_cleanup, start_index=1, heading=True):
+        """Full per-image sections with recommendations repeated for every cracked image"""
+        styles = self.styles
+        story = []
+
+        # Detailed results
+        if heading:
+            story.append(Paragraph("Detailed Analysis Results:", self.subtitle_style))
+            story.append(Spacer(1, 12))
+
+        for i, result in enumerate(batch_results, start_index):
+            if result.get('cracked', False):
+                crack_type = result.get('orientation') or 'Unknown'
+
+                # Fix the duplicate "crack" word issue
+                if 'crack' in crack_type.lower():
+                    heading_text = f"Image {i}: {crack_type.title()} Detected"
+                else:
+                    heading_text = f"Image {i}: {crack_type.title()} Crack Detected"
+
+                # Get crack-specific information
+                crack_info = self._get_crack_info(crack_type)
+
+                # Handle annotated image first
+                img_flowable = None
+                if result.get('annotated_image'):
+                    try:
+                        temp_image_path = self._save_base64_image(result['annotated_image'])
+                        if temp_image_path:
+                            temp_files_to_cleanup.append(temp_image_path)
+
+                        if temp_image_path and os.path.exists(temp_image_path):
+                            img_flowable = Image(temp_image_path, width=2.5*inch, height=1.8*inch)
+
+                    except Exception as e:
+                        print(f"Error processing annotated image for result {i}: {str(e)}")
+
+                # Create header with image on the right
+                if img_flowable:
+                    header_data = [[
+                        Paragraph(heading_text, styles['Heading3']),
+                        img_flowable
+                    ]]
+
+                    header_table = Table(header_data, colWidths=[3.5*inch, 2.5*inch])
+                    header_table.setStyle(self.header_table_style)
+
+                    story.append(header_table)
+                else:
+                    story.append(Paragraph(heading_text, styles['Heading3']))
+
+                story.append(Spacer(1, 8))
+
+                # Create compact details layout
+                details_data = [
+                    ['Severity:', crack_info['severity'], 'Urgency:', crack_info['urgency']]
+                ]
+
+                details_table = Table(details_data, colWidths=[1*inch, 1.5*inch, 1*inch, 1.5*inch])
+                details_table.setStyle(self.details_table_style)
+
+                story.append(details_table)
+                story.append(Spacer(1, 8))
+
+                # Add crack details in compact format
+                self._add_recommendation_lists(story, crack_info, styles, spacing=6)
+
+                story.append(Spacer(1, 15))  # Reduced spacing between images
+
+            else:
+                story.append(Paragraph(f"Image {i}: No Crack Detected", styles['Heading3']))
+                story.append(Paragraph("No specific recommendations required for this image.", styles['Normal']))
+                story.append(Spacer(1, 10))  # Reduced spacing for non-cracked images
+
+        return story
+
+    def _general_recommendations_story(self, recommendations):
+        """Numbered closing recommendations section"""
+        title, items = recommendations
+        story = [Paragraph(title, self.subtitle_style)]
+        for i, item in enumerate(items, 1):
+            story.append(Paragraph(f"{i}. {item}", self.styles['Normal']))
+        return story
+
+    def _recommendations_appendix_story(self, crack_types):
+        """Causes, solutions and prevention printed once per crack type found"""
+        crack_keys = []
+        for crack_type in crack_types:
+            crack_key = self._get_crack_key(crack_type or 'Unknown')
+            if crack_key not in crack_keys:
+                crack_keys.append(crack_key)
+
+        if not crack_keys:
+            return []
+
+        story = [PageBreak(), Paragraph("Appendix: Recommendations by Crack Type", self.subtitle_style)]
+        for crack_key in crack_keys:
+            story.append(Paragraph(crack_key.title(), self.styles['Heading3']))
+            self._add_text_only_crack_details(story, crack_key, self.styles)
+            story.append(Spacer(1, 15))
+        return story
+
+    def _thumbnail_flowable(self, image_string):
+        """Downscaled in-memory thumbnail for the compact grid, or '-' if unavailable"""
+        if not image_string:
+            return '-'
+        try:
+            with PILImage.open(io.BytesIO(self._decode_base64_image(image_string))) as pil_img:
+                # draft() lets JPEG sources decode at reduced scale; it is a no-op for PNG
+                pil_img.draft('RGB', THUMBNAIL_PIXELS)
+                pil_img.thumbnail(THUMBNAIL_PIXELS, resample=PILImage.BILINEAR)
+                if pil_img.mode != 'RGB':
+                    pil_img = pil_img.convert('RGB')
+                thumb_buffer = io.BytesIO()
+                pil_img.save(thumb_buffer, format='JPEG', quality=80)
+            thumb_buffer.seek(0)
+            return Image(thumb_buffer, width=THUMBNAIL_WIDTH, height=THUMBNAIL_HEIGHT, kind='proportional')
+        except Exception as e:
+            print(f"Error creating thumbnail: {str(e)}")
+            return '-'
+
+    def _cleanup_temp_files(self, temp_files):
+        """Remove temporary image files once the PDF has been built"""
+        for temp_file in temp_files:
+            if temp_file and os.path.exists(temp_file):
+                try:
+                    os.remove(temp_file)
+                except Exception as cleanup_error:
+                    print(f"Warning: Could not clean up temporary file {temp_file}: {cleanup_error}")
+
+    def _add_recommendation_lists(self, story, crack_info, styles, spacing=8):
+        """Append the causes, solutions and prevention bullet lists"""
+        story.append(Paragraph("<b>Possible Causes:</b>", styles['Heading4']))
+        for cause in crack_info['causes']:
+            story.append(Paragraph(f"• {cause}", styles['Normal']))
+        story.append(Spacer(1, spacing))
+
+        story.append(Paragraph("<b>Recommended Solutions:</b>", styles['Heading4']))
+        for solution in crack_info['solutions']:
+            story.append(Paragraph(f"• {solution}", styles['Normal']))
+        story.append(Spacer(1, spacing))
+
+        story.append(Paragraph("<b>Prevention Measures:</b>", styles['Heading4']))
+        for prevention in crack_info['prevention']:
+            story.append(Paragraph(f"• {prevention}", styles['Normal']))
+
     def _add_text_only_crack_details(self, story, crack_type, styles):
         """Helper method to add crack details in text-only format"""
         crack_key = self._get_crack_key(crack_type)
@@ -584,252 +827,179 @@ class ReportService:
         for prevention in crack_info['prevention']:
             story.append(Paragraph(f"• {prevention}", styles['Normal']))
     
-    def generate_video_report(self, video_results):
+    def generate_video_report(self, video_results, layout='compact'):
         """Generate PDF report for video processing results"""
         try:
-            buffer = io.BytesIO()
-            doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=0.5*inch)
-            styles = getSampleStyleSheet()
-            story = []
-            
-            # Custom styles
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=24,
-                spaceAfter=30,
-                alignment=1,
-                textColor=colors.darkblue
-            )
-            
-            subtitle_style = ParagraphStyle(
-                'CustomSubtitle',
-                parent=styles['Heading2'],
-                fontSize=16,
-                spaceAfter=15,
-                textColor=colors.darkred
-            )
-            
-            # Title
-            story.append(Paragraph("Video Crack Detection Analysis Report", title_style))
-            story.append(Spacer(1, 20))
-            
-            # Report metadata
-            current_time = datetime.now()
-            total_detections = len(video_results)
-            
-            report_info = [
-                ['Report Generated:', current_time.strftime('%Y-%m-%d %H:%M:%S')],
-                ['Total Crack Detections:', str(total_detections)],
-                ['Analysis Type:', 'Video Processing'],
-                ['Detection Method:', 'Frame-by-frame Analysis']
-            ]
-            
-            info_table = Table(report_info, colWidths=[2.5*inch, 3*inch])
-            info_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, -1), colors.lightblue),
-                ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ]))
-            story.append(info_table)
-            story.append(Spacer(1, 20))
-            
-            # Timeline analysis
-            if video_results:
-                story.append(Paragraph("Timeline Analysis:", subtitle_style))
-                
-                timeline_data = [['Frame #', 'Timestamp (s)', 'Crack Type']]
-                for result in video_results:
-                    frame_num = result.get('Frame #', 'N/A')
-                    timestamp = result.get('Timestamp (s)', 'N/A')
-                    crack_type = result.get('Classification', 'Unknown')
-                    timeline_data.append([str(frame_num), str(timestamp), crack_type])
-                
-                timeline_table = Table(timeline_data, colWidths=[1.5*inch, 1.5*inch, 2.5*inch])
-                timeline_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, 0), 12),
-                    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ]))
-                story.append(timeline_table)
-                story.append(Spacer(1, 30))
-            
-            # Crack type summary
-            crack_summary = {}
-            for result in video_results:
-                crack_type = result.get('Classification', 'Unknown')
-                crack_summary[crack_type] = crack_summary.get(crack_type, 0) + 1
-            
-            if crack_summary:
-                story.append(Paragraph("Crack Type Distribution:", subtitle_style))
-                summary_data = [['Crack Type', 'Occurrences']]
-                for crack_type, count in crack_summary.items():
-                    summary_data.append([crack_type, str(count)])
-                
-                summary_table = Table(summary_data, colWidths=[3*inch, 1*inch])
-                summary_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, 0), 14),
-                    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ]))
-                story.append(summary_table)
-                story.append(Spacer(1, 20))
-            
-            # Detailed Frame Analysis
-            story.append(Paragraph("Detailed Frame Analysis:", subtitle_style))
-            story.append(Spacer(1, 12))
-            
-            # Store temporary files for cleanup after PDF generation
-            temp_files_to_cleanup = []
-            
-            for i, result in enumerate(video_results, 1):
-                frame_num = result.get('Frame #', f'Frame {i}')
-                timestamp = result.get('Timestamp (s)', 'N/A')
-                crack_type = result.get('Classification', 'Unknown')
-                
-                # Fix the duplicate "crack" word issue
-                if 'crack' in crack_type.lower():
-                    heading_text = f"{frame_num} (Timestamp: {timestamp}s) - {crack_type.title()} Detected"
-                else:
-                    heading_text = f"{frame_num} (Timestamp: {timestamp}s) - {crack_type.title()} Crack Detected"
-                
-                # Get crack-specific information
-                crack_key = self._get_crack_key(crack_type)
-                crack_info = self.crack_solutions.get(crack_key, self.crack_solutions['unprecidented crack'])
-                
-                # Handle annotated image first
-                img_flowable = None
-                if result.get('Full Annotated Image'):
-                    try:
-                        temp_image_path = self._save_base64_image(result['Full Annotated Image'])
-                        if temp_image_path:
-                            temp_files_to_cleanup.append(temp_image_path)
-                        
-                        if temp_image_path and os.path.exists(temp_image_path):
-                            img_flowable = Image(temp_image_path, width=2.5*inch, height=1.8*inch)
-                    except Exception as e:
-                        print(f"Error processing annotated frame for result {i}: {str(e)}")
-                
-                # Create header with image on the right
-                if img_flowable:
-                    header_data = [[
-                        Paragraph(heading_text, styles['Heading3']),
-                        img_flowable
-                    ]]
-                    
-                    header_table = Table(header_data, colWidths=[3.5*inch, 2.5*inch])
-                    header_table.setStyle(TableStyle([
-                        ('ALIGN', (0, 0), (0, 0), 'LEFT'),
-                        ('ALIGN', (1, 0), (1, 0), 'CENTER'),
-                        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                        ('LEFTPADDING', (0, 0), (-1, -1), 0),
-                        ('RIGHTPADDING', (0, 0), (-1, -1), 0),
-                        ('TOPPADDING', (0, 0), (-1, -1), 3),
-                        ('BOTTOMPADDING', (0, 0), (-1, -1), 3)
-                    ]))
-                    
-                    story.append(header_table)
-                else:
-                    story.append(Paragraph(heading_text, styles['Heading3']))
-                
-                story.append(Spacer(1, 8))
-                
-                # Create compact details layout
-                details_data = [
-                    ['Frame:', frame_num, 'Timestamp:', f"{timestamp}s"],
-                    ['Severity:', crack_info['severity'], 'Urgency:', crack_info['urgency']]
-                ]
-                
-                details_table = Table(details_data, colWidths=[1*inch, 1.5*inch, 1*inch, 1.5*inch])
-                details_table.setStyle(TableStyle([
-                    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-                    ('FONTSIZE', (0, 0), (-1, -1), 9),
-                    ('FONTNAME', (0, 0), (0, 0), 'Helvetica-Bold'),
-                    ('FONTNAME', (2, 0), (2, 0), 'Helvetica-Bold'),
-                    ('FONTNAME', (0, 1), (0, 1), 'Helvetica-Bold'),
-                    ('FONTNAME', (2, 1), (2, 1), 'Helvetica-Bold'),
-                    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                    ('LEFTPADDING', (0, 0), (-1, -1), 2),
-                    ('RIGHTPADDING', (0, 0), (-1, -1), 2),
-                    ('TOPPADDING', (0, 0), (-1, -1), 3),
-                    ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
-                    ('BACKGROUND', (0, 0), (-1, -1), colors.lightgrey)
-                ]))
-                
-                story.append(details_table)
-                story.append(Spacer(1, 8))
-                
-                # Add crack details in compact format
-                story.append(Paragraph("<b>Possible Causes:</b>", styles['Heading4']))
-                for cause in crack_info['causes']:
-                    story.append(Paragraph(f"• {cause}", styles['Normal']))
-                story.append(Spacer(1, 6))
-                
-                story.append(Paragraph("<b>Recommended Solutions:</b>", styles['Heading4']))
-                for solution in crack_info['solutions']:
-                    story.append(Paragraph(f"• {solution}", styles['Normal']))
-                story.append(Spacer(1, 6))
-                
-                story.append(Paragraph("<b>Prevention Measures:</b>", styles['Heading4']))
-                for prevention in crack_info['prevention']:
-                    story.append(Paragraph(f"• {prevention}", styles['Normal']))
-                
-                story.append(Spacer(1, 15))  # Reduced spacing between frames
-            
-            # General Recommendations
-            story.append(Paragraph("General Video Analysis Recommendations:", subtitle_style))
-            story.append(Paragraph(
-                "1. Focus inspection efforts on the timestamps where cracks were detected.",
-                styles['Normal']
-            ))
-            story.append(Paragraph(
-                "2. Conduct detailed physical inspection at the identified locations.",
-                styles['Normal']
-            ))
-            story.append(Paragraph(
-                "3. Monitor crack progression by comparing with future video analyses.",
-                styles['Normal']
-            ))
-            story.append(Paragraph(
-                "4. Prioritize repair actions based on crack type severity levels indicated above.",
-                styles['Normal']
-            ))
-            
-            # Build PDF
-            doc.build(story)
-            
-            # Clean up temporary files after PDF is built
-            for temp_file in temp_files_to_cleanup:
-                if temp_file and os.path.exists(temp_file):
-                    try:
-                        os.remove(temp_file)
-                    except Exception as cleanup_error:
-                        print(f"Warning: Could not clean up temporary file {temp_file}: {cleanup_error}")
-            
-            buffer.seek(0)
-            return buffer
-            
+            return self._render_report('video', video_results, layout)
+
         except Exception as e:
             print(f"Error in generate_video_report: {str(e)}")
             import traceback
             traceback.print_exc()
             raise e
-    
+
+    def _video_summary_story(self, video_results, include_timeline=True):
+        """Title, metadata, optional timeline and crack distribution for a video report"""
+        story = []
+
+        # Title
+        story.append(Paragraph("Video Crack Detection Analysis Report", self.title_style))
+        story.append(Spacer(1, 20))
+
+        # Report metadata
+        current_time = datetime.now()
+        total_detections = len(video_results)
+
+        report_info = [
+            ['Report Generated:', current_time.strftime('%Y-%m-%d %H:%M:%S')],
+            ['Total Crack Detections:', str(total_detections)],
+            ['Analysis Type:', 'Video Processing'],
+            ['Detection Method:', 'Frame-by-frame Analysis']
+        ]
+
+        info_table = Table(report_info, colWidths=[2.5*inch, 3*inch])
+        info_table.setStyle(self.info_table_style)
+        story.append(info_table)
+        story.append(Spacer(1, 20))
+
+        # Timeline analysis (the compact grid already carries frame and timestamp)
+        if video_results and include_timeline:
+            story.append(Paragraph("Timeline Analysis:", self.subtitle_style))
+
+            timeline_data = [['Frame #', 'Timestamp (s)', 'Crack Type']]
+            for result in video_results:
+                frame_num = result.get('Frame #', 'N/A')
+                timestamp = result.get('Timestamp (s)', 'N/A')
+                crack_type = result.get('Classification', 'Unknown')
+                timeline_data.append([str(frame_num), str(timestamp), crack_type])
+
+            timeline_table = Table(timeline_data, colWidths=[1.5*inch, 1.5*inch, 2.5*inch])
+            timeline_table.setStyle(self.timeline_table_style)
+            story.append(timeline_table)
+            story.append(Spacer(1, 30))
+
+        # Crack type summary
+        crack_summary = {}
+        for result in video_results:
+            crack_type = result.get('Classification', 'Unknown')
+            crack_summary[crack_type] = crack_summary.get(crack_type, 0) + 1
+
+        if crack_summary:
+            story.append(Paragraph("Crack Type Distribution:", self.subtitle_style))
+            summary_data = [['Crack Type', 'Occurrences']]
+            for crack_type, count in crack_summary.items():
+                summary_data.append([crack_type, str(count)])
+
+            summary_table = Table(summary_data, colWidths=[3*inch, 1*inch])
+            summary_table.setStyle(self.summary_table_style)
+            story.append(summary_table)
+            story.append(Spacer(1, 20))
+
+        return story
+
+    def _video_grid_story(self, video_results, start_index=1, heading=True):
+        """One grid row per detected frame; recommendations live in the appendix"""
+        story = [Paragraph("Frame Results:", self.subtitle_style)] if heading else []
+
+        grid_data = [['Frame #', 'Timestamp (s)', 'Annotated Frame', 'Crack Type', 'Severity']]
+        for i, result in enumerate(video_results, start_index):
+            crack_type = result.get('Classification') or 'Unknown'
+            crack_info = self._get_crack_info(crack_type)
+            grid_data.append([
+                str(result.get('Frame #', i)),
+                str(result.get('Timestamp (s)', 'N/A')),
+                self._thumbnail_flowable(result.get('Full Annotated Image')),
+                crack_type,
+                crack_info['severity']
+            ])
+
+        grid_table = Table(
+            grid_data,
+            colWidths=[0.8*inch, 1*inch, 1.4*inch, 1.9*inch, 1.1*inch],
+            repeatRows=1
+        )
+        grid_table.setStyle(self.grid_table_style)
+        story.append(grid_table)
+        story.append(Spacer(1, 20))
+        return story
+
+    def _video_detailed_story(self, video_results, temp_files_to_cleanup, start_index=1, heading=True):
+        """Full per-frame sections with recommendations repeated for every frame"""
+        styles = self.styles
+        story = []
+
+        # Detailed Frame Analysis
+        if heading:
+            story.append(Paragraph("Detailed Frame Analysis:", self.subtitle_style))
+            story.append(Spacer(1, 12))
+
+        for i, result in enumerate(video_results, start_index):
+            frame_num = result.get('Frame #', f'Frame {i}')
+            timestamp = result.get('Timestamp (s)', 'N/A')
+            crack_type = result.get('Classification') or 'Unknown'
+
+            # Fix the duplicate "crack" word issue
+            if 'crack' in crack_type.lower():
+                heading_text = f"{frame_num} (Timestamp: {timestamp}s) - {crack_type.title()} Detected"
+            else:
+                heading_text = f"{frame_num} (Timestamp: {timestamp}s) - {crack_type.title()} Crack Detected"
+
+            # Get crack-specific information
+            crack_info = self._get_crack_info(crack_type)
+
+            # Handle annotated image first
+            img_flowable = None
+            if result.get('Full Annotated Image'):
+                try:
+                    temp_image_path = self._save_base64_image(result['Full Annotated Image'])
+                    if temp_image_path:
+                        temp_files_to_cleanup.append(temp_image_path)
+
+                    if temp_image_path and os.path.exists(temp_image_path):
+                        img_flowable = Image(temp_image_path, width=2.5*inch, height=1.8*inch)
+                except Exception as e:
+                    print(f"Error processing annotated frame for result {i}: {str(e)}")
+
+            # Create header with image on the right
+            if img_flowable:
+                header_data = [[
+                    Paragraph(heading_text, styles['Heading3']),
+                    img_flowable
+                ]]
+
+                header_table = Table(header_data, colWidths=[3.5*inch, 2.5*inch])
+                header_table.setStyle(self.header_table_style)
+
+                story.append(header_table)
+            else:
+                story.append(Paragraph(heading_text, styles['Heading3']))
+
+            story.append(Spacer(1, 8))
+
+            # Create compact details layout
+            details_data = [
+                ['Frame:', frame_num, 'Timestamp:', f"{timestamp}s"],
+                ['Severity:', crack_info['severity'], 'Urgency:', crack_info['urgency']]
+            ]
+
+            details_table = Table(details_data, colWidths=[1*inch, 1.5*inch, 1*inch, 1.5*inch])
+            details_table.setStyle(self.details_table_style)
+
+            story.append(details_table)
+            story.append(Spacer(1, 8))
+
+            # Add crack details in compact format
+            self._add_recommendation_lists(story, crack_info, styles, spacing=6)
+
+            story.append(Spacer(1, 15))  # Reduced spacing between frames
+
+        return story
+
+    def _get_crack_info(self, crack_type):
+        """Look up the recommendation entry for a crack type label"""
+        crack_key = self._get_crack_key(crack_type)
+        return self.crack_solutions.get(crack_key, self.crack_solutions['unprecidented crack'])
+
     def _get_crack_key(self, crack_type):
         """Helper method to get crack key from crack type"""
         crack_type = crack_type.lower()
@@ -841,3 +1011,96 @@ class ReportService:
             return 'unprecidented crack'
         else:
             return 'unprecidented crack'  # Default to unprecedented for unknown types
+
+
+def _summary_view(kind, result):
+    """Strip a result down to the fields the summary section needs"""
+    return {key: result[key] for key in _SUMMARY_KEYS[kind] if key in result}
+
+
+def _draw_page_footer(pdf_canvas, page_num, page_count):
+    """Draw the 'Page N of M' footer shared by in-process and merged reports"""
+    pdf_canvas.saveState()
+    pdf_canvas.setFont('Helvetica', 8)
+    pdf_canvas.setFillColor(colors.grey)
+    pdf_canvas.drawCentredString(A4[0] / 2, 0.4*inch, f"Page {page_num} of {page_count}")
+    pdf_canvas.restoreState()
+
+
+class NumberedCanvas(canvas.Canvas):
+    """Canvas that defers page output until the total page count is known"""
+
+    def __init__(self, *args, **kwargs):
+        canvas.Canvas.__init__(self, *args, **kwargs)
+        self._saved_page_states = []
+
+    def showPage(self):
+        self._saved_page_states.append(dict(self.__dict__))
+        self._startPage()
+
+    def save(self):
+        page_count = len(self._saved_page_states)
+        for state in self._saved_page_states:
+            self.__dict__.update(state)
+            _draw_page_footer(self, self._pageNumber, page_count)
+            canvas.Canvas.showPage(self)
+        canvas.Canvas.save(self)
+
+
+def _merge_with_page_numbers(part_pdfs):
+    """Concatenate rendered parts and stamp continuous page numbers across them"""
+    writer = PdfWriter()
+    for part_pdf in part_pdfs:
+        writer.append(PdfReader(io.BytesIO(part_pdf)))
+
+    page_count = len(writer.pages)
+    overlay_buffer = io.BytesIO()
+    overlay = canvas.Canvas(overlay_buffer, pagesize=A4)
+    for page_num in range(1, page_count + 1):
+        _draw_page_footer(overlay, page_num, page_count)
+        overlay.showPage()
+    overlay.save()
+
+    overlay_pages = PdfReader(io.BytesIO(overlay_buffer.getvalue())).pages
+    for page, overlay_page in zip(writer.pages, overlay_pages):
+        page.merge_page(overlay_page)
+
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+_report_pool = None
+_report_pool_lock = threading.Lock()
+_worker_service = None
+
+
+def _get_report_pool():
+    """Lazily start the shared report worker pool"""
+    global _report_pool
+    # Concurrent reports run in the threadpool; without the lock each could start its own pool
+    with _report_pool_lock:
+        if _report_pool is None:
+            # spawn keeps workers free of the parent's model and thread state
+            _report_pool = ProcessPoolExecutor(
+                max_workers=REPORT_WORKERS,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _report_pool
+
+
+def _reset_report_pool():
+    global _report_pool
+    with _report_pool_lock:
+        if _report_pool is not None:
+            _report_pool.shutdown(wait=False, cancel_futures=True)
+            _report_pool = None
+
+
+def _render_part_in_worker(part):
+    """Worker entry point: render one report part with a per-process ReportService"""
+    global _worker_service
+    if _worker_service is None:
+        _worker_service = ReportService()
+    return _worker_service._render_part_pdf(part)
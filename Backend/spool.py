@@ -0,0 +1,187 @@
+"""Upload spooling for large inputs.
+
+/zip_upload reads Starlette's own spooled temp file in place. /video needs a named file for
+OpenCV, so spool_request_file() parses the multipart body itself and streams the file part
+straight to UPLOAD_SPOOL_DIR: the video is written to disk once, hashed and size-checked on
+the way, and only one chunk is held in memory at a time.
+"""
+import hashlib
+import os
+import tempfile
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+# Where large uploads are spooled before processing, and the disk write chunk size
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR") or tempfile.gettempdir()
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+
+
+class SpooledUpload:
+    """An upload written to disk, with its size and SHA-256; removes the file on exit"""
+
+    def __init__(self, path, size, sha256, filename=None):
+        self.path = path
+        self.size = size
+        self.sha256 = sha256
+        self.filename = filename
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.remove()
+        return False
+
+
+def too_large(max_bytes):
+    return HTTPException(status_code=413, detail=f"Upload exceeds {max_bytes // (1024 * 1024)} MB limit")
+
+
+def check_upload_size(upload, max_bytes):
+    """413 if an UploadFile Starlette already spooled is over max_bytes"""
+    if max_bytes is not None and upload.size is not None and upload.size > max_bytes:
+        raise too_large(max_bytes)
+
+
+class _FilePart:
+    """Receives one multipart file part and writes it to a spool file in chunk_size blocks"""
+
+    def __init__(self, directory, extensions, max_bytes, chunk_size):
+        self.directory = directory
+        self.extensions = extensions
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.filename = None
+        self.path = None
+        self.out = None
+        self.buffer = bytearray()
+
+    def open(self, filename):
+        if self.extensions and not filename.lower().endswith(self.extensions):
+            raise HTTPException(status_code=400, detail=f"File must be one of {', '.join(self.extensions)}")
+        self.filename = filename
+        # Keep the extension so OpenCV picks the right demuxer
+        fd, self.path = tempfile.mkstemp(suffix=os.path.splitext(filename)[1].lower(), dir=self.directory)
+        self.out = os.fdopen(fd, "wb")
+
+    def add(self, data):
+        self.size += len(data)
+        if self.max_bytes is not None and self.size > self.max_bytes:
+            raise too_large(self.max_bytes)
+        self.buffer += data
+
+    def take(self, final=False):
+        """Buffered bytes ready to be written, once a full chunk (or the end) is reached"""
+        if len(self.buffer) < self.chunk_size and not (final and self.buffer):
+            return None
+        data, self.buffer = bytes(self.buffer), bytearray()
+        return data
+
+    def write(self, data):
+        self.digest.update(data)
+        self.out.write(data)
+
+    def discard(self):
+        if self.out is not None:
+            self.out.close()
+            os.remove(self.path)
+
+
+async def spool_request_file(request, field="file", extensions=None, max_bytes=None, directory=None,
+                             chunk_size=UPLOAD_CHUNK_SIZE):
+    """Stream the multipart file field of a request to disk; returns a SpooledUpload.
+
+    Use it instead of an UploadFile parameter, which would already have copied the body
+    into Starlette's own temp file. Hashing and disk writes run in the threadpool.
+    """
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    boundary = options.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise HTTPException(status_code=400, detail="Expected a multipart/form-data upload")
+
+    part = _FilePart(directory or UPLOAD_SPOOL_DIR, extensions, max_bytes, chunk_size)
+    state = {"header_field": b"", "header_value": b"", "disposition": None, "in_file": False}
+
+    def on_header_field(data, start, end):
+        state["header_field"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        state["header_value"] += data[start:end]
+
+    def on_header_end():
+        if state["header_field"].lower() == b"content-disposition":
+            state["disposition"] = parse_options_header(state["header_value"])[1]
+        state["header_field"] = state["header_value"] = b""
+
+    def on_headers_finished():
+        disposition = state["disposition"] or {}
+        state["disposition"] = None
+        state["in_file"] = (
+            disposition.get(b"name") == field.encode() and b"filename" in disposition and part.out is None
+        )
+        if state["in_file"]:
+            part.open(disposition[b"filename"].decode("utf-8", "replace"))
+
+    def on_part_data(data, start, end):
+        if state["in_file"]:
+            part.add(data[start:end])
+
+    def on_part_end():
+        state["in_file"] = False
+
+    parser = MultipartParser(boundary, {
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            data = part.take()
+            if data:
+                await run_in_threadpool(part.write, data)
+        parser.finalize()
+        if part.out is None:
+            raise HTTPException(status_code=400, detail=f"Upload a file in the '{field}' form field")
+        data = part.take(final=True)
+        if data:
+            await run_in_threadpool(part.write, data)
+        part.out.close()
+    except BaseException:
+        part.discard()
+        raise
+
+    return SpooledUpload(part.path, part.size, part.digest.hexdigest(), part.filename)
+
+
+# OpenAPI request body for endpoints that read their file with spool_request_file
+FILE_UPLOAD_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                }
+            }
+        },
+    }
+}
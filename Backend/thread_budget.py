@@ -0,0 +1,110 @@
+import math
+import os
+import sys
+
+# torch, TensorFlow and OpenCV each size their thread pools to every core on the host. With
+# several server workers, or a container CPU quota, they oversubscribe the CPUs. This splits the
+# CPUs actually available to the container between the workers and pins every library to that
+# share. Override with INTRA_OP_THREADS / INTER_OP_THREADS / OPENCV_THREADS.
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def cgroup_cpu_limit():
+    """CPU quota from cgroup v2 or v1 as a (possibly fractional) CPU count, or None if unlimited"""
+    cpu_max = _read('/sys/fs/cgroup/cpu.max')
+    if cpu_max:
+        quota, _, period = cpu_max.partition(' ')
+        if quota != 'max' and period:
+            return int(quota) / int(period)
+        return None
+
+    quota = _read('/sys/fs/cgroup/cpu/cpu.cfs_quota_us')
+    period = _read('/sys/fs/cgroup/cpu/cpu.cfs_period_us')
+    if quota and period and int(quota) > 0:
+        return int(quota) / int(period)
+    return None
+
+
+def available_cpus():
+    """CPUs this process may use: the affinity mask capped by the cgroup quota"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS/Windows
+        cpus = os.cpu_count() or 1
+    limit = cgroup_cpu_limit()
+    if limit is not None:
+        cpus = min(cpus, max(1, math.ceil(limit)))
+    return cpus
+
+
+def _env_threads(name, default):
+    value = os.getenv(name)
+    return max(1, int(value)) if value else default
+
+
+def plan_threads(cpus=None, workers=None):
+    """Thread settings for one server worker, from the CPU budget and worker count"""
+    cpus = cpus or available_cpus()
+    workers = workers or int(os.getenv('WEB_CONCURRENCY', '1'))
+    share = max(1, cpus // max(workers, 1))
+    return {
+        'cpus': cpus,
+        'cgroup_limit': cgroup_cpu_limit(),
+        'workers': workers,
+        'intra_op': _env_threads('INTRA_OP_THREADS', share),
+        'inter_op': _env_threads('INTER_OP_THREADS', 1 if share < 4 else 2),
+        'opencv': _env_threads('OPENCV_THREADS', share),
+    }
+
+
+def configure_threads(plan=None):
+    """Apply the plan to OpenCV and to torch/TensorFlow if they are imported; returns effective settings.
+
+    Must run before torch or TensorFlow execute their first op, since neither can resize its
+    pools afterwards.
+    """
+    import cv2
+
+    plan = dict(plan or plan_threads())
+    for var in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+        os.environ.setdefault(var, str(plan['intra_op']))
+
+    cv2.setNumThreads(plan['opencv'])
+    plan['opencv'] = cv2.getNumThreads()
+
+    if 'torch' in sys.modules:
+        torch = sys.modules['torch']
+        torch.set_num_threads(plan['intra_op'])
+        try:
+            torch.set_num_interop_threads(plan['inter_op'])
+        except RuntimeError as e:  # already started parallel work
+            print(f"Could not set torch inter-op threads: {e}")
+        plan['torch'] = (torch.get_num_threads(), torch.get_num_interop_threads())
+
+    if 'tensorflow' in sys.modules:
+        tf = sys.modules['tensorflow']
+        try:
+            tf.config.threading.set_intra_op_parallelism_threads(plan['intra_op'])
+            tf.config.threading.set_inter_op_parallelism_threads(plan['inter_op'])
+        except RuntimeError as e:  # runtime already initialised
+            print(f"Could not set TensorFlow threads: {e}")
+        plan['tensorflow'] = (
+            tf.config.threading.get_intra_op_parallelism_threads(),
+            tf.config.threading.get_inter_op_parallelism_threads(),
+        )
+
+    limit = f"{plan['cgroup_limit']:g}" if plan['cgroup_limit'] is not None else "none"
+    print(
+        f"Thread budget: {plan['cpus']} CPUs (cgroup quota {limit}), {plan['workers']} worker(s) -> "
+        f"intra-op {plan['intra_op']}, inter-op {plan['inter_op']}, OpenCV {plan['opencv']}"
+        + (f", torch {plan['torch'][0]}/{plan['torch'][1]}" if 'torch' in plan else "")
+        + (f", TensorFlow {plan['tensorflow'][0]}/{plan['tensorflow'][1]}" if 'tensorflow' in plan else "")
+    )
+    return plan
@@ -0,0 +1,93 @@
+import numpy as np
+
+
+def iou_matrix(boxes_a, boxes_b):
+    """Pairwise IoU between two (n, 4) and (m, 4) arrays of xyxy boxes"""
+    a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(boxes_b, dtype=np.float32).reshape(-1, 4)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-9), 0.0)
+
+
+class Track:
+    __slots__ = ('track_id', 'box', 'confidence', 'first_frame', 'last_frame', 'hits', 'missed', 'orientation')
+
+    def __init__(self, track_id, box, confidence, frame_num):
+        self.track_id = track_id
+        self.box = box
+        self.confidence = confidence
+        self.first_frame = frame_num
+        self.last_frame = frame_num
+        self.hits = 1
+        self.missed = 0
+        self.orientation = None
+
+
+class IouTracker:
+    """Greedy IoU tracker: each detection extends the overlapping track it matches best.
+
+    A track ends once it has gone unmatched for more than max_missed consecutive updates.
+    """
+
+    def __init__(self, iou_threshold=0.3, max_missed=10):
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.tracks = []
+        self._next_id = 1
+
+    def update(self, boxes, confidences, frame_num):
+        """Match this frame's xyxy boxes to tracks.
+
+        Returns (matched, started, ended): matched lists the track for each input box, in
+        input order; started and ended are the tracks created and retired on this frame.
+        """
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        matched = [None] * len(boxes)
+
+        if len(boxes) and self.tracks:
+            ious = iou_matrix(boxes, [track.box for track in self.tracks])
+            # Best pairs first; each box and each track is used at most once
+            for flat in np.argsort(-ious, axis=None):
+                box_index, track_index = divmod(int(flat), ious.shape[1])
+                if ious[box_index, track_index] < self.iou_threshold:
+                    break
+                track = self.tracks[track_index]
+                if matched[box_index] is not None or track.last_frame == frame_num:
+                    continue
+                track.box = boxes[box_index]
+                track.confidence = float(confidences[box_index])
+                track.last_frame = frame_num
+                track.hits += 1
+                track.missed = 0
+                matched[box_index] = track
+
+        started = []
+        for index, track in enumerate(matched):
+            if track is None:
+                track = Track(self._next_id, boxes[index], float(confidences[index]), frame_num)
+                self._next_id += 1
+                self.tracks.append(track)
+                matched[index] = track
+                started.append(track)
+
+        ended = []
+        for track in self.tracks:
+            if track.last_frame != frame_num:
+                track.missed += 1
+                if track.missed > self.max_missed:
+                    ended.append(track)
+        if ended:
+            self.tracks = [track for track in self.tracks if track.missed <= self.max_missed]
+        return matched, started, ended
+
+    def finish(self):
+        """Retire and return every remaining track"""
+        remaining, self.tracks = self.tracks, []
+        return remaining
@@ -0,0 +1,56 @@
+import os
+import re
+import time
+import uuid
+
+import cv2
+
+# Annotated videos written by /video?output=video, served from /video/output/{video_id}
+VIDEO_OUTPUT_DIR = os.getenv("VIDEO_OUTPUT_DIR", "video_outputs")
+# Finished videos are deleted this many seconds after they were written
+VIDEO_OUTPUT_TTL = float(os.getenv("VIDEO_OUTPUT_TTL", "3600"))
+# H.264 plays in browsers but needs an OpenCV build with an encoder; MPEG-4 Part 2 always works
+VIDEO_OUTPUT_FOURCCS = os.getenv("VIDEO_OUTPUT_FOURCCS", "avc1,mp4v").split(",")
+
+_VIDEO_ID = re.compile(r"^[0-9a-f]{32}$")
+
+# First fourcc that opened successfully; skips failing encoders on later requests
+_working_fourcc = None
+
+
+def prune_outputs(now=None):
+    """Delete annotated videos older than VIDEO_OUTPUT_TTL"""
+    if not os.path.isdir(VIDEO_OUTPUT_DIR):
+        return
+    cutoff = (now or time.time()) - VIDEO_OUTPUT_TTL
+    for name in os.listdir(VIDEO_OUTPUT_DIR):
+        path = os.path.join(VIDEO_OUTPUT_DIR, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def open_writer(fps, width, height):
+    """Return (video_id, path, cv2.VideoWriter) for a new annotated output video"""
+    global _working_fourcc
+    os.makedirs(VIDEO_OUTPUT_DIR, exist_ok=True)
+    prune_outputs()
+    video_id = uuid.uuid4().hex
+    path = os.path.join(VIDEO_OUTPUT_DIR, f"{video_id}.mp4")
+    for fourcc in [_working_fourcc] if _working_fourcc else VIDEO_OUTPUT_FOURCCS:
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*fourcc.strip()), fps, (width, height))
+        if writer.isOpened():
+            _working_fourcc = fourcc
+            return video_id, path, writer
+        writer.release()
+    raise RuntimeError(f"No usable video encoder among {', '.join(VIDEO_OUTPUT_FOURCCS)}")
+
+
+def output_path(video_id):
+    """Path of a finished annotated video, or None if the id is unknown or malformed"""
+    if not _VIDEO_ID.match(video_id):
+        return None
+    path = os.path.join(VIDEO_OUTPUT_DIR, f"{video_id}.mp4")
+    return path if os.path.isfile(path) else None